@@ -1,7 +1,9 @@
 from django.contrib import admin
-from .models import Recipe, Ingredient, Instruction, Collection
+from .models import Recipe, Ingredient, Instruction, Collection, ImportJob, ExtractionCache
 
 admin.site.register_collection = admin.site.register(Recipe)
 admin.site.register(Ingredient)
 admin.site.register(Instruction)
-admin.site.register(Collection)
\ No newline at end of file
+admin.site.register(Collection)
+admin.site.register(ImportJob)
+admin.site.register(ExtractionCache)
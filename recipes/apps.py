@@ -7,4 +7,6 @@ class RecipesConfig(AppConfig):
 
     def ready(self):
         # needed for UserProfile signal
-        import recipes.models
\ No newline at end of file
+        import recipes.models
+        # keeps RecipeSearchIndex in sync
+        import recipes.signals
\ No newline at end of file
@@ -0,0 +1,151 @@
+import time
+import tracemalloc
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe, Ingredient, Instruction, UserProfile
+from services.recipeCorpus import generateCorpus, QUERIES
+from services.searchBackends import BACKENDS, ScanBackend, getSearchBackend
+from services.searchRecipes import searchRecipes, rebuildSearchIndex, CHUNK_SIZE
+from services import discoverySearch
+
+
+class Command(BaseCommand):
+    help = (
+        "Misst die Rezeptsuche auf einem synthetischen Korpus (p50/p95-Latenz, "
+        "Datenbankabfragen, Spitzenspeicher). Alle Testdaten werden am Ende zurückgerollt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=2000, help="Größe des Korpus.")
+        parser.add_argument("--repeat", type=int, default=5, help="Durchläufe pro Anfrage.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--backends",
+            help="Kommagetrennt, z.B. scan,sqlite_fts5,discovery. Standard: alle verfügbaren.",
+        )
+        parser.add_argument(
+            "--query", action="append", dest="queries", help="Eigene Anfrage (mehrfach möglich)."
+        )
+
+    def handle(self, *args, **options):
+        backends = self.backends(options["backends"])
+        queries = options["queries"] or QUERIES
+
+        self.stdout.write(f"Erzeuge {options['recipes']} Rezepte (seed={options['seed']}) ...")
+        with transaction.atomic():
+            owner, searcher = self.loadCorpus(generateCorpus(options["recipes"], options["seed"]))
+            self.stdout.write(
+                f"{'backend':<16}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}{'peak KiB':>12}"
+            )
+            for name in backends:
+                run = self.runner(name, owner, searcher)
+                for query in queries:
+                    run(query)  # Warmup: Shards, Pools und Caches aufbauen
+
+                latencies, query_counts = [], []
+                for _ in range(options["repeat"]):
+                    for query in queries:
+                        with CaptureQueriesContext(connection) as captured:
+                            start = time.perf_counter()
+                            run(query)
+                            latencies.append((time.perf_counter() - start) * 1000)
+                        query_counts.append(len(captured))
+
+                tracemalloc.start()
+                peak = 0
+                for query in queries:
+                    tracemalloc.reset_peak()
+                    run(query)
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{name:<16}{np.percentile(latencies, 50):>10.2f}"
+                    f"{np.percentile(latencies, 95):>10.2f}"
+                    f"{np.mean(query_counts):>10.1f}{peak / 1024:>12.0f}"
+                )
+            transaction.set_rollback(True)
+
+    def backends(self, selection):
+        available = [ScanBackend.name]
+        default = getSearchBackend().name
+        if default not in available:
+            available.append(default)
+        available.append("discovery")
+        if not selection:
+            return available
+
+        names = [name.strip() for name in selection.split(",") if name.strip()]
+        unknown = [name for name in names if name not in BACKENDS and name != "discovery"]
+        if unknown:
+            raise CommandError(f"Unbekannte Backends: {', '.join(unknown)}")
+        return names
+
+    def runner(self, name, owner, searcher):
+        page_size = settings.SEARCH_PAGE_SIZE
+        if name == "discovery":
+            # synchron, ein Hintergrund-Thread sähe den nicht committeten Korpus nicht
+            discoverySearch.rebuildShards()
+            return lambda query: discoverySearch.discoverRecipes(searcher, query, page_size + 1)
+
+        backend = BACKENDS[name]()
+
+        def run(query):
+            entries = backend.candidates(owner, query).order_by("recipe_id").values_list(
+                "recipe_id", "title", "ingredients"
+            )
+            results = searchRecipes(query, entries.iterator(chunk_size=CHUNK_SIZE), limit=page_size + 1)
+            Recipe.objects.in_bulk([recipe_id for recipe_id, score in results])
+
+        return run
+
+    def loadCorpus(self, corpus):
+        owner = User.objects.create_user(f"benchmark-owner-{time.time_ns()}")
+        searcher = User.objects.create_user(f"benchmark-searcher-{time.time_ns()}")
+        UserProfile.objects.filter(user=searcher).update(public_profile=False)
+
+        recipes = Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    user=owner,
+                    original_creator=owner,
+                    title=data["title"],
+                    description=data["description"],
+                    prep_time=data["prep_time"],
+                    cook_time=data["cook_time"],
+                    servings=data["servings"],
+                )
+                for data in corpus
+            ],
+            batch_size=500,
+        )
+        if recipes and recipes[0].pk is None:
+            # MySQL liefert bei bulk_create keine IDs zurück
+            pks = Recipe.objects.filter(user=owner).order_by("id").values_list("id", flat=True)
+            for recipe, pk in zip(recipes, pks):
+                recipe.pk = pk
+
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(recipe=recipe, **ing)
+                for recipe, data in zip(recipes, corpus)
+                for ing in data["ingredients"]
+            ],
+            batch_size=1000,
+        )
+        Instruction.objects.bulk_create(
+            [
+                Instruction(recipe=recipe, step_number=i + 1, description=desc)
+                for recipe, data in zip(recipes, corpus)
+                for i, desc in enumerate(data["instructions"])
+            ],
+            batch_size=1000,
+        )
+        rebuildSearchIndex(owner)
+        return owner, searcher
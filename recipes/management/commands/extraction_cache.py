@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from recipes.models import ExtractionCache
+from services.extractionCache import evictExtractions
+
+
+class Command(BaseCommand):
+    help = "Zeigt Kennzahlen des Extraktions-Caches, räumt ihn auf oder leert ihn."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Alle Einträge löschen.")
+        parser.add_argument(
+            "--evict", action="store_true", help="Auf EXTRACTION_CACHE_MAX_ENTRIES kürzen."
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted, _ = ExtractionCache.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"{deleted} Einträge gelöscht."))
+            return
+        if options["evict"]:
+            self.stdout.write(self.style.SUCCESS(f"{evictExtractions()} Einträge verdrängt."))
+
+        entries = ExtractionCache.objects.count()
+        hits = ExtractionCache.objects.aggregate(total=Sum("hits"))["total"] or 0
+        # jeder Eintrag entstand aus genau einem Fehlschlag; verdrängte Einträge fehlen
+        lookups = hits + entries
+        hit_rate = hits / lookups if lookups else 0.0
+        self.stdout.write(
+            f"{entries} Einträge, {hits} Treffer insgesamt, Trefferquote {hit_rate:.0%} "
+            "(laufende Prozesse schreiben ihre eigene Quote ins Import-Log)."
+        )
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.models import Recipe
+from services.searchCache import bumpLibraryVersion
+from services.thumbnailMirror import mirrorThumbnail
+from services.thumbnailRefresh import refreshThumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        "Spiegelt die Vorschaubilder älterer Rezepte lokal (neue Importe machen "
+        "das selbst). Abgelaufene URLs werden vorher erneuert."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, help="Höchstens so viele Rezepte bearbeiten.")
+
+    def handle(self, *args, **options):
+        recipe_ids = list(
+            Recipe.objects.filter(thumbnail_variants__isnull=True)
+            .exclude(thumbnail__isnull=True)
+            .exclude(thumbnail="")
+            .order_by("id")
+            .values_list("id", flat=True)[: options["limit"]]
+        )
+        mirrored = 0
+        batch_size = settings.THUMBNAIL_SCHEDULER_BATCH
+        for start in range(0, len(recipe_ids), batch_size):
+            recipes = list(
+                Recipe.objects.filter(id__in=recipe_ids[start:start + batch_size]).only(
+                    "id", "user_id", "url", "thumbnail", "thumbnail_expires_at"
+                )
+            )
+            now = timezone.now()
+            expired = [
+                recipe for recipe in recipes
+                if recipe.url and recipe.thumbnail_expires_at and recipe.thumbnail_expires_at <= now
+            ]
+            thumbnails = refreshThumbnails(expired) if expired else {}
+
+            changed = []
+            for recipe in recipes:
+                recipe.thumbnail_variants = mirrorThumbnail(thumbnails.get(recipe.id, recipe.thumbnail))
+                if recipe.thumbnail_variants:
+                    changed.append(recipe)
+            if changed:
+                Recipe.objects.bulk_update(changed, ["thumbnail_variants"])
+                for user_id in {recipe.user_id for recipe in changed}:
+                    bumpLibraryVersion(user_id)
+            mirrored += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"{mirrored} von {len(recipe_ids)} Vorschaubildern gespiegelt."))
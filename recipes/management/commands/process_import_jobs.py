@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import ImportJob
+from services.importJobs import resumeStaleJobs, runImportJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Arbeitet liegen gebliebene Rezept-Importe ab, z.B. nach einem Neustart "
+        "der Web-Prozesse."
+    )
+
+    def handle(self, *args, **options):
+        resumed = resumeStaleJobs(include_running=True)
+        queued = list(
+            ImportJob.objects.filter(status=ImportJob.Status.QUEUED)
+            .order_by("created_at")
+            .values_list("id", flat=True)
+        )
+        for job_id in queued:
+            runImportJob(job_id)
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(queued)} Importe bearbeitet ({len(resumed)} wieder aufgenommen).")
+        )
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from services.searchRecipes import rebuildSearchIndex, checkSearchIndex
+
+
+class Command(BaseCommand):
+    help = "Baut den Rezept-Suchindex neu auf oder prüft ihn gegen die Datenbank."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Nur die Rezepte dieses Benutzernamens.")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Nur prüfen, nichts schreiben. Beendet sich mit Fehler bei Abweichungen.",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"Benutzer '{options['user']}' existiert nicht.")
+
+        if options["check"]:
+            diff = checkSearchIndex(user)
+            for kind, recipe_ids in diff.items():
+                if recipe_ids:
+                    sample = ", ".join(map(str, recipe_ids[:20]))
+                    self.stdout.write(f"{kind}: {len(recipe_ids)} ({sample})")
+            if any(diff.values()):
+                raise CommandError("Suchindex ist nicht konsistent.")
+            self.stdout.write(self.style.SUCCESS("Suchindex ist konsistent."))
+            return
+
+        count = rebuildSearchIndex(user)
+        self.stdout.write(self.style.SUCCESS(f"{count} Rezepte indexiert."))
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.models import Recipe
+from services.thumbnailRefresh import refreshThumbnails
+from services.tokenBucket import TokenBucket
+
+
+def isOffPeak(now=None):
+    start, end = settings.THUMBNAIL_OFF_PEAK_HOURS
+    hour = timezone.localtime(now).hour
+    # Fenster über Mitternacht, z.B. (22, 5)
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+
+def dueRecipeIds(now):
+    """
+    Rezepte, deren signiertes Vorschaubild innerhalb von THUMBNAIL_REFRESH_HORIZON
+    abläuft: zuerst die noch gültigen (bald ablaufende vorn), danach die schon
+    abgelaufenen, die ältesten am Schluss, damit gelöschte Videos nicht jede
+    Nacht das Kontingent aufbrauchen.
+    """
+    # lokal gespiegelte Vorschaubilder laufen nicht ab
+    due = Recipe.objects.exclude(url__isnull=True).exclude(url="").filter(thumbnail_variants__isnull=True)
+    upcoming = due.filter(
+        thumbnail_expires_at__gte=now,
+        thumbnail_expires_at__lte=now + timedelta(seconds=settings.THUMBNAIL_REFRESH_HORIZON),
+    ).order_by("thumbnail_expires_at")
+    expired = due.filter(thumbnail_expires_at__lt=now).order_by("-thumbnail_expires_at")
+    return list(upcoming.values_list("id", flat=True)) + list(expired.values_list("id", flat=True))
+
+
+class Command(BaseCommand):
+    help = (
+        "Erneuert signierte Vorschaubilder, bevor sie ablaufen. Läuft nur in den "
+        "Nebenzeiten (THUMBNAIL_OFF_PEAK_HOURS) und gedrosselt, z.B. stündlich per Cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Auch außerhalb der Nebenzeiten laufen.")
+        parser.add_argument("--limit", type=int, help="Höchstens so viele Rezepte bearbeiten.")
+        parser.add_argument("--dry-run", action="store_true", help="Nur zählen, nichts abrufen.")
+
+    def handle(self, *args, **options):
+        if not options["force"] and not isOffPeak():
+            self.stdout.write("Außerhalb der Nebenzeiten, nichts zu tun.")
+            return
+
+        recipe_ids = dueRecipeIds(timezone.now())[: options["limit"]]
+        if options["dry_run"]:
+            self.stdout.write(f"{len(recipe_ids)} Vorschaubilder fällig.")
+            return
+
+        batch_size = settings.THUMBNAIL_SCHEDULER_BATCH
+        bucket = TokenBucket(settings.THUMBNAIL_SCHEDULER_PER_MINUTE / 60, batch_size)
+        processed = refreshed = 0
+        for start in range(0, len(recipe_ids), batch_size):
+            if not options["force"] and not isOffPeak():
+                self.stdout.write("Nebenzeit vorbei, Rest folgt beim nächsten Lauf.")
+                break
+            batch = recipe_ids[start:start + batch_size]
+            for _ in batch:
+                bucket.acquire()
+            recipes = Recipe.objects.filter(id__in=batch).only("id", "user_id", "url", "thumbnail")
+            refreshed += len(refreshThumbnails(recipes))
+            processed += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{refreshed} von {processed} Vorschaubildern erneuert ({len(recipe_ids)} fällig).")
+        )
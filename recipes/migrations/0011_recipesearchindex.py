@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize(text):
+    return " ".join(str(text or "").lower().split())
+
+
+def build_search_index(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeSearchIndex = apps.get_model("recipes", "RecipeSearchIndex")
+
+    entries = []
+    for recipe in Recipe.objects.prefetch_related("ingredients"):
+        entries.append(
+            RecipeSearchIndex(
+                recipe=recipe,
+                user_id=recipe.user_id,
+                title=normalize(recipe.title),
+                ingredients="\n".join(
+                    normalize(ing.name) for ing in recipe.ingredients.all()
+                ),
+            )
+        )
+    RecipeSearchIndex.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_rename_user_profile_userprofile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSearchIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('ingredients', models.TextField(blank=True)),
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_index', to='recipes.recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_index', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
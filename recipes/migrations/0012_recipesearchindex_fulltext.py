@@ -0,0 +1,101 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:04
+
+from django.db import migrations, models, transaction
+from django.db.utils import DatabaseError
+
+INDEX_TABLE = "recipes_recipesearchindex"
+FTS_TABLE = "recipes_recipesearchindex_fts"
+FULLTEXT_INDEX = "recipes_recipesearchindex_fulltext"
+
+SQLITE_FTS = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description, ingredients,
+        content='{INDEX_TABLE}', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {INDEX_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, ingredients)
+        VALUES (new.id, new.title, new.description, new.ingredients);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {INDEX_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, ingredients)
+        VALUES ('delete', old.id, old.title, old.description, old.ingredients);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {INDEX_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, ingredients)
+        VALUES ('delete', old.id, old.title, old.description, old.ingredients);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, ingredients)
+        VALUES (new.id, new.title, new.description, new.ingredients);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_DROP_FTS = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def normalize(text):
+    return " ".join(str(text or "").lower().split())
+
+
+def index_descriptions(apps, schema_editor):
+    RecipeSearchIndex = apps.get_model("recipes", "RecipeSearchIndex")
+
+    entries = list(RecipeSearchIndex.objects.select_related("recipe"))
+    for entry in entries:
+        entry.description = normalize(entry.recipe.description)
+    RecipeSearchIndex.objects.bulk_update(entries, ["description"], batch_size=500)
+
+
+def create_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        # FTS5 mit trigram-Tokenizer braucht SQLite >= 3.34; sonst bleibt es beim Scan
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for statement in SQLITE_FTS:
+                    schema_editor.execute(statement)
+        except DatabaseError:
+            pass
+    elif vendor == "mysql":
+        schema_editor.execute(
+            f"ALTER TABLE {INDEX_TABLE} ADD FULLTEXT INDEX {FULLTEXT_INDEX} "
+            "(title, description, ingredients) WITH PARSER ngram"
+        )
+
+
+def drop_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for statement in SQLITE_DROP_FTS:
+            schema_editor.execute(statement)
+    elif vendor == "mysql":
+        schema_editor.execute(f"ALTER TABLE {INDEX_TABLE} DROP INDEX {FULLTEXT_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipesearchindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipesearchindex',
+            name='description',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(index_descriptions, migrations.RunPython.noop),
+        migrations.RunPython(create_fulltext, drop_fulltext),
+    ]
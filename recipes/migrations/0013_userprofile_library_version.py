@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipesearchindex_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='library_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_extractioncache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='batch',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_importjob_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='extract_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='fetch_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='persist_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
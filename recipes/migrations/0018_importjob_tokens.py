@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_importjob_timings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='tokens_after',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='tokens_before',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
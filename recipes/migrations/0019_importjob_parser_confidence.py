@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0018_importjob_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='parser_confidence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:24
+
+import re
+from urllib.parse import urlsplit
+
+from django.db import migrations, models
+
+TIKTOK_VIDEO_RE = re.compile(r"/(?:video|photo|v)/(\d+)")
+INSTAGRAM_SHORTCODE_RE = re.compile(r"^/(?:[\w.]+/)?(?:p|reel|reels|tv)/([\w-]+)")
+
+
+def source_key(url):
+    # Stand von services.canonicalUrl.canonicalKey ohne Auflösen von Kurzlinks
+    url = (url or "").strip()
+    if not url:
+        return None
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+    host = (parts.hostname or "").removeprefix("www.").removeprefix("m.")
+    if host.endswith("tiktok.com"):
+        match = TIKTOK_VIDEO_RE.search(parts.path)
+        return f"tiktok:{match.group(1)}" if match else None
+    if host.endswith("instagram.com"):
+        match = INSTAGRAM_SHORTCODE_RE.match(parts.path)
+        return f"instagram:{match.group(1)}" if match else None
+    return None
+
+
+def fill_source_keys(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    recipes = []
+    for recipe in Recipe.objects.exclude(url__isnull=True).exclude(url="").only("id", "url"):
+        recipe.source_key = source_key(recipe.url)
+        if recipe.source_key:
+            recipes.append(recipe)
+    Recipe.objects.bulk_update(recipes, ["source_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0019_importjob_parser_confidence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='source_key',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(fill_source_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:31
+
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import migrations, models
+
+
+def thumbnail_expiry(url):
+    # Stand von services.thumbnailExpiry.thumbnailExpiry
+    query = parse_qs(urlsplit(url).query)
+    try:
+        if "x-expires" in query:
+            timestamp = int(query["x-expires"][0])
+        elif "oe" in query:
+            timestamp = int(query["oe"][0], 16)
+        else:
+            return None
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def fill_thumbnail_expiry(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    recipes = []
+    for recipe in Recipe.objects.exclude(thumbnail__isnull=True).exclude(thumbnail="").only("id", "thumbnail"):
+        recipe.thumbnail_expires_at = thumbnail_expiry(recipe.thumbnail)
+        if recipe.thumbnail_expires_at:
+            recipes.append(recipe)
+    Recipe.objects.bulk_update(recipes, ["thumbnail_expires_at"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0020_recipe_source_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnail_expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnail_fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_thumbnail_expiry, migrations.RunPython.noop),
+    ]
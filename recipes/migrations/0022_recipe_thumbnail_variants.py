@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0021_recipe_thumbnail_freshness'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnail_variants',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+INDEX_TABLE = "recipes_recipesearchindex"
+OLD_FULLTEXT_INDEX = "recipes_recipesearchindex_fulltext"
+FULLTEXT_INDEX = "recipes_recipesearchindex_fulltext_ti"
+
+
+# Auf SQLite filtert die Suche die FTS5-Spalten direkt ({title ingredients}),
+# nur der MySQL-Index muss ohne description neu angelegt werden.
+def title_ingredients_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(f"ALTER TABLE {INDEX_TABLE} DROP INDEX {OLD_FULLTEXT_INDEX}")
+        schema_editor.execute(
+            f"ALTER TABLE {INDEX_TABLE} ADD FULLTEXT INDEX {FULLTEXT_INDEX} "
+            "(title, ingredients) WITH PARSER ngram"
+        )
+
+
+def full_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(f"ALTER TABLE {INDEX_TABLE} DROP INDEX {FULLTEXT_INDEX}")
+        schema_editor.execute(
+            f"ALTER TABLE {INDEX_TABLE} ADD FULLTEXT INDEX {OLD_FULLTEXT_INDEX} "
+            "(title, description, ingredients) WITH PARSER ngram"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0022_recipe_thumbnail_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(title_ingredients_fulltext, full_fulltext),
+    ]
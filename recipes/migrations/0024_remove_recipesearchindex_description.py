@@ -0,0 +1,84 @@
+from django.db import migrations, models, transaction
+from django.db.utils import DatabaseError
+
+INDEX_TABLE = "recipes_recipesearchindex"
+FTS_TABLE = "recipes_recipesearchindex_fts"
+
+
+def sqlite_fts(columns):
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    columns = ", ".join(columns)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            {columns},
+            content='{INDEX_TABLE}', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        f"""
+        CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {INDEX_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {INDEX_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {INDEX_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old});
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new});
+        END
+        """,
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+
+
+SQLITE_DROP_FTS = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def drop_fts(apps, schema_editor):
+    # SQLite baut die Tabelle für RemoveField neu auf, die Trigger gingen dabei verloren
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_DROP_FTS:
+            schema_editor.execute(statement)
+
+
+def create_fts(columns):
+    def create(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        # ohne trigram-Tokenizer (SQLite < 3.34) bleibt es wie in 0012 beim Scan
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for statement in sqlite_fts(columns):
+                    schema_editor.execute(statement)
+        except DatabaseError:
+            pass
+
+    return create
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0023_recipesearchindex_fulltext_title_ingredients'),
+    ]
+
+    # description wird seit 0023 weder durchsucht noch gerankt; MySQL indexiert
+    # sie schon nicht mehr, auf SQLite wird die FTS5-Tabelle ohne sie neu angelegt
+    operations = [
+        migrations.RunPython(drop_fts, create_fts(("title", "description", "ingredients"))),
+        migrations.RemoveField(
+            model_name='recipesearchindex',
+            name='description',
+        ),
+        migrations.RunPython(create_fts(("title", "ingredients")), drop_fts),
+    ]
@@ -1,10 +1,51 @@
 from django.db import models
 from django.contrib.auth.models import User, AbstractUser
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.dispatch import receiver
+from django.db.models.functions import Substr
 from django.db.models.signals import post_save
 
 
+# Felder für Rezeptkarten (RecipeQuerySet.for_cards)
+CARD_FIELDS = (
+    "id",
+    "title",
+    "prep_time",
+    "servings",
+    "url",
+    "thumbnail",
+    "thumbnail_variants",
+    "original_creator__id",
+    "original_creator__username",
+)
+# reicht für truncatewords:20 in der Karte
+CARD_DESCRIPTION_CHARS = 300
+
+
+class RecipeQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Rezepte, die `user` sehen darf: eigene, von Freunden und von öffentlichen Profilen.
+        """
+        return self.filter(
+            models.Q(user=user)
+            | models.Q(user__in=Friend.objects.filter(user=user).values("friends"))
+            | models.Q(user__userprofile__public_profile=True)
+        )
+
+    def for_cards(self):
+        """
+        Nur die Spalten, die components/recipe_card.html anzeigt, samt Ersteller
+        im selben SELECT und einer gekürzten Beschreibung als description_preview.
+        Neueste zuerst; eine Seite Karten kostet so eine Abfrage, egal wie viele.
+        """
+        return (
+            self.select_related("original_creator")
+            .only(*CARD_FIELDS)
+            .annotate(description_preview=Substr("description", 1, CARD_DESCRIPTION_CHARS))
+            .order_by("-id")
+        )
 
 
 class Recipe(models.Model):
@@ -22,11 +63,46 @@ class Recipe(models.Model):
     cook_time = models.CharField(max_length=50, null=True, blank=True)
     servings = models.CharField(max_length=50, null=True, blank=True)
     thumbnail = models.URLField(max_length=500, null=True, blank=True)
+    # wann das Vorschaubild zuletzt geholt wurde und wann seine signierte URL abläuft
+    thumbnail_fetched_at = models.DateTimeField(null=True, blank=True)
+    thumbnail_expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # lokal gespiegelte Varianten (services.thumbnailMirror): {"webp": {"256": name}, "jpeg": {...}}
+    thumbnail_variants = models.JSONField(null=True, blank=True)
     url = models.URLField(null=True, blank=True)
+    # kanonischer Schlüssel des Videos (services.canonicalUrl), z.B. "tiktok:7312..."
+    source_key = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+
+    objects = RecipeQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    def _thumbnail_urls(self, key):
+        variants = (self.thumbnail_variants or {}).get(key, {})
+        return [
+            (width, default_storage.url(variants[width]))
+            for width in sorted(variants, key=int)
+        ]
+
+    def _thumbnail_srcset(self, key):
+        return ", ".join(f"{url} {width}w" for width, url in self._thumbnail_urls(key))
+
+    @property
+    def thumbnail_src(self):
+        """
+        Kleinste lokale JPEG-Variante, sonst die entfernte URL.
+        """
+        urls = self._thumbnail_urls("jpeg")
+        return urls[0][1] if urls else self.thumbnail
+
+    @property
+    def thumbnail_srcset(self):
+        return self._thumbnail_srcset("jpeg")
+
+    @property
+    def thumbnail_webp_srcset(self):
+        return self._thumbnail_srcset("webp")
+
 
 class Ingredient(models.Model):
     recipe = models.ForeignKey(
@@ -75,9 +151,79 @@ class Collection(models.Model):
     def __str__(self):
         return self.name
 
+class ImportJob(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Wartet"
+        RUNNING = "running", "Läuft"
+        DONE = "done", "Fertig"
+        FAILED = "failed", "Fehlgeschlagen"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="import_jobs")
+    url = models.CharField(max_length=500)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.QUEUED, db_index=True
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # gemeinsamer Schlüssel aller Jobs eines Sammel-Imports
+    batch = models.UUIDField(null=True, blank=True, db_index=True)
+    # Dauer der einzelnen Schritte des letzten Versuchs in Millisekunden
+    fetch_ms = models.PositiveIntegerField(null=True, blank=True)
+    extract_ms = models.PositiveIntegerField(null=True, blank=True)
+    persist_ms = models.PositiveIntegerField(null=True, blank=True)
+    # geschätzte Token der Beschreibung vor und nach captionCleaner
+    tokens_before = models.PositiveIntegerField(null=True, blank=True)
+    tokens_after = models.PositiveIntegerField(null=True, blank=True)
+    # Konfidenz des regelbasierten Parsers; darunter übernimmt das Sprachmodell
+    parser_confidence = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    def __str__(self):
+        return f"{self.url} ({self.status})"
+
+
+class ExtractionCache(models.Model):
+    # sha256 über normalisierten Text, Prompt-Version und Modell
+    key = models.CharField(max_length=64, unique=True)
+    recipe = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+# Auf SQLite hängt die FTS5-Tabelle recipes_recipesearchindex_fts per Trigger an dieser
+# Tabelle (Migration 0024) - Schemaänderungen hier müssen die Trigger neu anlegen.
+class RecipeSearchIndex(models.Model):
+    recipe = models.OneToOneField(
+        Recipe, on_delete=models.CASCADE, related_name="search_index"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="search_index"
+    )
+    # normalized via services.searchRecipes.normalize
+    title = models.CharField(max_length=255)
+    ingredients = models.TextField(blank=True)
+
+    def __str__(self):
+        return self.title
+
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     public_profile = models.BooleanField(default=True)
+    # bumped on every recipe/ingredient change, keys the search caches
+    library_version = models.PositiveIntegerField(default=0)
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -0,0 +1,58 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Recipe, Ingredient
+from services.searchRecipes import indexRecipe
+from services.searchCache import bumpLibraryVersion
+
+INDEXED_RECIPE_FIELDS = {"user", "title"}
+
+
+def _deleted_from(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, update_fields=None, raw=False, **kwargs):
+    # materializeRecipe indexiert erst, wenn auch die Zutaten gespeichert sind
+    if raw or getattr(instance, "_materializing", False):
+        return
+    if update_fields is not None and not INDEXED_RECIPE_FIELDS & set(update_fields):
+        return
+    indexRecipe(instance)
+
+
+@receiver(post_save, sender=Ingredient)
+def index_ingredient_recipe(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and "name" not in update_fields:
+        return
+    indexRecipe(instance.recipe)
+
+
+@receiver(post_delete, sender=Ingredient)
+def unindex_ingredient(sender, instance, origin=None, **kwargs):
+    # beim Löschen des ganzen Rezepts (oder Users) räumt der CASCADE den Index auf
+    if _deleted_from(origin) is not Ingredient:
+        return
+    indexRecipe(instance.recipe)
+
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def bump_recipe_library(sender, instance, raw=False, **kwargs):
+    if raw or getattr(instance, "_materializing", False):
+        return
+    bumpLibraryVersion(instance.user_id)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredient_library(sender, instance, raw=False, origin=None, **kwargs):
+    # beim Löschen des ganzen Rezepts hat bump_recipe_library das schon erledigt
+    if raw or (origin is not None and _deleted_from(origin) is not Ingredient):
+        return
+    bumpLibraryVersion(instance.recipe.user_id)
@@ -5,6 +5,8 @@ urlpatterns = [
     path("", views.login_view, name="login"),
     path("landing_page/", views.landing_page, name="landing_page"),
     path("add/", views.recipe_input, name="recipe_input"),
+    path("add/status/<int:job_id>/", views.import_job_status, name="import_job_status"),
+    path("add/batch/<uuid:batch>/", views.import_batch_status, name="import_batch_status"),
     path("login/", views.login_view, name="login"),
     path("signup/", views.signup_view, name="signup"),
     path("logout/", views.logout_view, name="logout"),
@@ -31,6 +33,8 @@ urlpatterns = [
     path("friends/remove/<int:friend_id>/", views.remove_friend, name="remove_friend"),
     path('collections/', views.collections_view, name='collections'),
     path('recipe/refresh_thumbnail/<int:recipe_id>/', views.refresh_thumbnail, name='refresh_thumbnail'),
+    path('recipe/refresh_thumbnails/', views.refresh_thumbnails, name='refresh_thumbnails'),
+    path("media/thumbnails/<path:name>", views.thumbnail_file, name="thumbnail_file"),
     path(
         "collection/add_recipe/",
         views.add_recipe_to_collection,
@@ -52,4 +56,6 @@ urlpatterns = [
         name="collection_detail",
     ),
     path("search/", views.search_view, name="search"),
+    path("search/suggest/", views.search_suggest, name="search_suggest"),
+    path("pantry/", views.pantry_view, name="pantry"),
 ]
@@ -6,14 +6,34 @@ from django.contrib.auth.decorators import login_required
 from django.conf import settings
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
 import json
-
-from .models import Recipe, Ingredient, Instruction, Friend, Collection, UserProfile
-from services.RecipeExtractor import RecipeExtractor
-from services.getTikTokDesc import getTikTokDesc
-from services.getInstaDesc import getInstaDesc
-from services.searchRecipes import searchRecipes
+import uuid
+
+from .models import (
+    Recipe,
+    Ingredient,
+    Instruction,
+    Friend,
+    Collection,
+    UserProfile,
+    ImportJob,
+)
+from services.thumbnailRefresh import refreshThumbnails
+from services.thumbnailMirror import THUMBNAIL_DIR
+from services.importRecipe import isSupportedLink
+from services.materializeRecipe import copyRecipe
+from services.importJobs import enqueueImport, enqueueImportBatch, submitImport, resumeStaleJobs
+from services.searchRecipes import searchRecipes, CHUNK_SIZE
+from services.searchBackends import getSearchBackend
+from services.searchSuggestions import suggestRecipes
+from services.searchCache import libraryVersion, searchCacheKey, getCachedSearch, cacheSearch
+from services.pantryMatch import matchPantry
+from services.discoverySearch import discoverRecipes
 from .forms import (
     RecipeForm,
     IngredientFormSet,
@@ -59,88 +79,102 @@ def logout_view(request):
 @login_required
 def recipe_input(request):
     if request.method == "POST":
+        if "links" in request.POST:
+            return _bulk_recipe_input(request)
+
         link = request.POST.get("tiktok_link", "").strip()
         if link:
-            try:
-                if "instagram.com" in link:
-                    description, thumbnail = getInstaDesc(link)
-                elif "tiktok.com" in link:
-                    description, thumbnail = getTikTokDesc(link)
-                else:
-                    toast_message = f"Es werden nur TikTok und Instagram-URLs unterstützt."
-                    response = HttpResponse(status=204)
-                    response['HX-Trigger'] = json.dumps({"show-toast": {"message": toast_message, "type": "error"}})
-                    return response
-
-                if not description or not thumbnail:
-                    toast_message = f"Fehler beim Extrahieren der Video Beschreibung"
-                    response = HttpResponse(status=204)
-                    response['HX-Trigger'] = json.dumps({
-                        "show-toast": {"message": toast_message, "type": "error"},
-                    })
-                    return response
-
-                extractor = RecipeExtractor(api_key=settings.LANGEXTRACT_API_KEY)
-                annotated_doc = extractor.extract_recipe(description)
-                print("annotated_doc:", annotated_doc)
-
-                if annotated_doc and annotated_doc.extractions:
-                    recipe_dict = None
-                    for ex in annotated_doc.extractions:
-                        if ex.extraction_class == "Recipe":
-                            recipe_dict = json.loads(ex.extraction_text)
-                            break
-
-                    if recipe_dict:
-                        recipe = Recipe.objects.create(
-                            user=request.user,
-                            original_creator=request.user,
-                            title=recipe_dict.get("title", ""),
-                            description=recipe_dict.get("description", ""),
-                            prep_time=recipe_dict.get("prep_time", ""),
-                            cook_time=recipe_dict.get("cook_time", ""),
-                            servings=recipe_dict.get("servings", ""),
-                            thumbnail=thumbnail,
-                            url=link,
-                        )
-                        for ing in recipe_dict.get("ingredients", []):
-                            Ingredient.objects.create(recipe=recipe, **ing)
-                        for i, desc in enumerate(recipe_dict.get("instructions", [])):
-                            Instruction.objects.create(
-                                recipe=recipe, step_number=i + 1, description=desc.strip()
-                            )
-                        
-                        toast_message = f"Rezept wurde erfolgreich hinzugefügt"
-                        response = HttpResponse(status=204)
-                        response['HX-Trigger'] = json.dumps({
-                            "show-toast": {"message": toast_message, "type": "success"},
-                            "reload-content": True
-                        })
-                        return response
-                    else:
-                        message = "Keine Recipe-Extraction gefunden."
-
-                else:
-                    toast_message = f"Fehler beim Extrahieren des Rezepts aus der Beschreibung."
-                    response = HttpResponse(status=204)
-                    response['HX-Trigger'] = json.dumps({
-                        "show-toast": {"message": toast_message, "type": "error"},
-                    })
-                    return response
-
-            # TODO: Error Messages
-            except Exception as e:
-                toast_message = e
+            if not isSupportedLink(link):
+                toast_message = f"Es werden nur TikTok und Instagram-URLs unterstützt."
                 response = HttpResponse(status=204)
-                response['HX-Trigger'] = json.dumps({
-                    "show-toast": {"message": toast_message, "type": "error"},
-                    "reload-content": True
-                })
+                response['HX-Trigger'] = json.dumps({"show-toast": {"message": toast_message, "type": "error"}})
                 return response
-        return render(request, "recipes/landing_page.html", {"message": message})
+
+            job = ImportJob.objects.create(user=request.user, url=link)
+            enqueueImport(job)
+            return render(request, "recipes/partials/import_job_partial.html", {"job": job})
     return render(request, "recipes/landing_page.html")
 
 
+def _bulk_recipe_input(request):
+    # ein Link pro Zeile (oder durch Leerzeichen getrennt), Duplikate nur einmal
+    links = list(dict.fromkeys(request.POST.get("links", "").split()))
+    supported = [link for link in links if isSupportedLink(link)][:settings.BULK_IMPORT_MAX_LINKS]
+    if not supported:
+        response = HttpResponse(status=204)
+        response['HX-Trigger'] = json.dumps({"show-toast": {"message": "Keine TikTok- oder Instagram-Links gefunden.", "type": "error"}})
+        return response
+
+    batch = uuid.uuid4()
+    jobs = ImportJob.objects.bulk_create(
+        [ImportJob(user=request.user, url=link, batch=batch) for link in supported]
+    )
+    if jobs[0].pk is None:
+        # MySQL liefert bei bulk_create keine IDs zurück
+        jobs = list(ImportJob.objects.filter(batch=batch).order_by("id"))
+    enqueueImportBatch(jobs)
+
+    response = render(request, "recipes/partials/import_batch_partial.html", _import_batch_context(batch, jobs))
+    skipped = len(links) - len(supported)
+    if skipped:
+        response['HX-Trigger'] = json.dumps({"show-toast": {"message": f"{skipped} Links übersprungen (nur TikTok und Instagram, höchstens {settings.BULK_IMPORT_MAX_LINKS}).", "type": "error"}})
+    return response
+
+
+def _import_batch_context(batch, jobs):
+    finished = [job for job in jobs if job.is_finished]
+    return {
+        "batch": batch,
+        "jobs": jobs,
+        "total": len(jobs),
+        "finished_count": len(finished),
+        "done_count": sum(job.status == ImportJob.Status.DONE for job in finished),
+        "is_finished": len(finished) == len(jobs),
+    }
+
+
+@login_required
+def import_batch_status(request, batch):
+    batch_jobs = ImportJob.objects.filter(user=request.user, batch=batch)
+    for stale_job_id in resumeStaleJobs(batch_jobs):
+        submitImport(stale_job_id)
+    jobs = list(batch_jobs.order_by("id"))
+    if not jobs:
+        return HttpResponse(status=404)
+
+    context = _import_batch_context(batch, jobs)
+    response = render(request, "recipes/partials/import_batch_partial.html", context)
+    if context["is_finished"]:
+        failed = context["total"] - context["done_count"]
+        message = f"{context['done_count']} von {context['total']} Rezepten hinzugefügt"
+        response['HX-Trigger'] = json.dumps({
+            "show-toast": {"message": message, "type": "error" if failed else "success"},
+            "reload-content": True
+        })
+    return response
+
+
+@login_required
+def import_job_status(request, job_id):
+    job = get_object_or_404(ImportJob, pk=job_id, user=request.user)
+    # zu lange wartende Jobs (z.B. nach einem Neustart) wieder anstoßen
+    for stale_job_id in resumeStaleJobs(ImportJob.objects.filter(pk=job.pk)):
+        submitImport(stale_job_id)
+        job.refresh_from_db()
+
+    response = render(request, "recipes/partials/import_job_partial.html", {"job": job})
+    if job.status == ImportJob.Status.DONE:
+        response['HX-Trigger'] = json.dumps({
+            "show-toast": {"message": "Rezept wurde erfolgreich hinzugefügt", "type": "success"},
+            "reload-content": True
+        })
+    elif job.status == ImportJob.Status.FAILED:
+        response['HX-Trigger'] = json.dumps({
+            "show-toast": {"message": job.error, "type": "error"},
+        })
+    return response
+
+
 @login_required
 def profile_view(request, user_id=None):
     if user_id:
@@ -169,10 +203,7 @@ def profile_view(request, user_id=None):
         html = f'<span id="profile-status-text" class="text-sm font-medium text-gray-600">{new_text}</span>'
         return HttpResponse(html)
 
-    if profile_user == request.user:
-        recipes = Recipe.objects.filter(user=profile_user).order_by("-id")
-    else:
-        recipes = Recipe.objects.filter(user=profile_user).order_by("-id")
+    recipes = Recipe.objects.for_cards().filter(user=profile_user)
 
     if request.headers.get("HX-Request") == "true":
         return render(
@@ -189,7 +220,7 @@ def profile_view(request, user_id=None):
 
 @login_required
 def landing_page(request):
-    recipes = Recipe.objects.filter(user=request.user).order_by("-id")
+    recipes = Recipe.objects.for_cards().filter(user=request.user)
 
     if request.headers.get("HX-Request") == "true":
         return render(request, "recipes/partials/landing_page_partial.html", {"recipes": recipes})
@@ -203,8 +234,9 @@ def recipe_detail(request, recipe_id):
 
     is_own_recipe = recipe.user == request.user
     is_friend_recipe = request.user.friend_profile.friends.filter(id=recipe.user.id).exists()
+    is_public_recipe = UserProfile.objects.filter(user=recipe.user, public_profile=True).exists()
 
-    if not (is_own_recipe or is_friend_recipe):
+    if not (is_own_recipe or is_friend_recipe or is_public_recipe):
         return redirect("landing_page")
     user_collections = Collection.objects.filter(user=request.user)
     collections_with_recipe = list(user_collections.filter(recipes=recipe).values_list('id', flat=True))
@@ -402,24 +434,7 @@ def add_recipe_from_friend(request, recipe_id):
         messages.info(request, "Du kannst deine eigenen Rezepte nicht kopieren.")
         return redirect("recipe_detail", recipe_id=original_recipe.id)
 
-    new_recipe = Recipe.objects.create(
-        user=request.user,
-        original_creator=original_recipe.user,
-        title=original_recipe.title,
-        description=original_recipe.description,
-        prep_time=original_recipe.prep_time,
-        cook_time=original_recipe.cook_time,
-        servings=original_recipe.servings,
-        thumbnail=original_recipe.thumbnail,
-        url=original_recipe.url,
-    )
-
-    for ing in original_recipe.ingredients.all():
-        Ingredient.objects.create(recipe=new_recipe, name=ing.name, quantity=ing.quantity, unit=ing.unit)
-
-    for instr in original_recipe.instruction_steps.all():
-        Instruction.objects.create(recipe=new_recipe, step_number=instr.step_number, description=instr.description)
-
+    new_recipe = copyRecipe(original_recipe, request.user)
     return redirect("recipe_detail", recipe_id=new_recipe.id)
 
 @login_required
@@ -478,7 +493,7 @@ def collections_view(request):
 @login_required
 def collection_detail(request, collection_id):
     collection = get_object_or_404(Collection, pk=collection_id, user=request.user)
-    recipes = collection.recipes.all()
+    recipes = Recipe.objects.for_cards().filter(collections=collection)
 
     context = {
         "collection": collection,
@@ -500,20 +515,53 @@ def remove_friend(request, friend_id):
 @login_required
 @require_POST
 def refresh_thumbnail(request, recipe_id):
-    recipe = get_object_or_404(Recipe, pk=recipe_id)
+    recipe = get_object_or_404(Recipe.objects.visible_to(request.user), pk=recipe_id)
     if not recipe.url:
         return JsonResponse({"status": "error", "message": "No TikTok URL for this recipe."}, status=400)
 
+    new_thumbnail_url = refreshThumbnails([recipe]).get(recipe.id)
+    if new_thumbnail_url:
+        return JsonResponse({"status": "ok", "thumbnail_url": new_thumbnail_url})
+    return JsonResponse({"status": "error", "message": "Could not retrieve new thumbnail."}, status=400)
+
+
+@login_required
+@require_POST
+def refresh_thumbnails(request):
+    """
+    Sammel-Variante von refresh_thumbnail: {"ids": [...]} rein,
+    {"thumbnails": {id: url}} raus. Rezepte ohne neues Bild fehlen in der Antwort.
+    """
     try:
-        _, new_thumbnail_url = getTikTokDesc(recipe.url)
-        if new_thumbnail_url:
-            recipe.thumbnail = new_thumbnail_url
-            recipe.save(update_fields=['thumbnail'])
-            return JsonResponse({"status": "ok", "thumbnail_url": new_thumbnail_url})
-        else:
-            return JsonResponse({"status": "error", "message": "Could not retrieve new thumbnail."}, status=400)
-    except Exception as e:
-        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+        ids = [int(recipe_id) for recipe_id in json.loads(request.body)["ids"]]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({"status": "error", "message": "Expected {\"ids\": [...]}."}, status=400)
+
+    recipes = (
+        Recipe.objects.visible_to(request.user)
+        .filter(id__in=ids[:settings.THUMBNAIL_REFRESH_MAX_IDS])
+        .exclude(url__isnull=True)
+        .exclude(url="")
+        .only("id", "user_id", "url", "thumbnail")
+    )
+    thumbnails = refreshThumbnails(recipes)
+    return JsonResponse({"status": "ok", "thumbnails": {str(k): v for k, v in thumbnails.items()}})
+
+
+@require_GET
+def thumbnail_file(request, name):
+    """
+    Liefert lokal gespiegelte Vorschaubilder aus default_storage. Die Namen
+    enthalten den Inhalts-Hash, deshalb dürfen Browser sie unbegrenzt cachen.
+    """
+    try:
+        file = default_storage.open(f"{THUMBNAIL_DIR}/{name}")
+    except (OSError, SuspiciousFileOperation):
+        # auch Verzeichnisse (IsADirectoryError) und fehlende Rechte
+        raise Http404
+    response = FileResponse(file)
+    patch_cache_control(response, public=True, max_age=settings.THUMBNAIL_CACHE_SECONDS, immutable=True)
+    return response
 
 
 @login_required
@@ -557,12 +605,88 @@ def remove_recipe_from_collection(request):
 @login_required
 def search_view(request):
     query = request.GET.get("q", "").strip()
-    results = []
-    recipes = Recipe.objects.filter(user=request.user)
-    if query:
-        results = searchRecipes(query, recipes)
-        recipes = [recipe for recipe, score in results]
-        print(recipes)
+    try:
+        offset = max(int(request.GET.get("offset", 0)), 0)
+    except ValueError:
+        offset = 0
+    page_size = settings.SEARCH_PAGE_SIZE
+    scope = "public" if request.GET.get("scope") == "public" else ""
+
+    if query and scope == "public":
+        results = discoverRecipes(request.user, query, limit=offset + page_size + 1)
+        has_more = len(results) > offset + page_size
+        results = results[offset:offset + page_size]
+        recipes_by_id = Recipe.objects.for_cards().in_bulk([recipe_id for recipe_id, score in results])
+        # gelöschte Rezepte können bis zum nächsten Shard-Neuaufbau noch auftauchen
+        recipes = [recipes_by_id[recipe_id] for recipe_id, score in results if recipe_id in recipes_by_id]
+    elif query:
+        version = libraryVersion(request.user.id)
+        cache_key = searchCacheKey(request.user.id, version, query, offset, page_size)
+        cached = getCachedSearch(cache_key) if version is not None else None
+        if cached is not None:
+            recipes, has_more = cached
+        else:
+            index_entries = getSearchBackend().candidates(request.user, query).order_by(
+                "recipe_id"
+            ).values_list("recipe_id", "title", "ingredients")
+            # eine Trefferzahl mehr als die Seite, um zu wissen ob es weitergeht
+            results = searchRecipes(
+                query, index_entries.iterator(chunk_size=CHUNK_SIZE), limit=offset + page_size + 1
+            )
+            has_more = len(results) > offset + page_size
+            results = results[offset:offset + page_size]
+            recipes_by_id = Recipe.objects.for_cards().in_bulk([recipe_id for recipe_id, score in results])
+            recipes = [recipes_by_id[recipe_id] for recipe_id, score in results]
+            if version is not None:
+                cacheSearch(cache_key, (recipes, has_more))
+    else:
+        recipes = list(
+            Recipe.objects.for_cards().filter(user=request.user).order_by("id")[offset:offset + page_size + 1]
+        )
+        has_more = len(recipes) > page_size
+        recipes = recipes[:page_size]
+
+    context = {
+        "query": query,
+        "scope": scope,
+        "recipes": recipes,
+        "has_more": has_more,
+        "next_offset": offset + page_size,
+    }
+    if request.headers.get("HX-Request") == "true":
+        if "offset" in request.GET:
+            return render(request, "recipes/partials/search_results_partial.html", context)
+        return render(request, "recipes/partials/search_partial.html", context)
+    return render(request, "recipes/search.html", context)
+
+
+@login_required
+def search_suggest(request):
+    query = request.GET.get("q", "")
+    suggestions = suggestRecipes(request.user, query) if query.strip() else []
+    return render(
+        request,
+        "recipes/partials/search_suggestions_partial.html",
+        {"suggestions": suggestions},
+    )
+
+
+@login_required
+def pantry_view(request):
+    items_text = request.GET.get("items", "").strip()
+    pantry_items = [item.strip() for item in items_text.replace(",", "\n").split("\n")]
+    pantry_items = [item for item in pantry_items if item]
+
+    matches = []
+    if pantry_items:
+        ranking = matchPantry(request.user, pantry_items)
+        recipes_by_id = Recipe.objects.for_cards().in_bulk([recipe_id for recipe_id, *_ in ranking])
+        matches = [
+            {"recipe": recipes_by_id[recipe_id], "matched": matched, "total": total, "missing": missing}
+            for recipe_id, matched, total, missing in ranking
+        ]
+
+    context = {"items": items_text, "pantry_items": pantry_items, "matches": matches}
     if request.headers.get("HX-Request") == "true":
-        return render(request, "recipes/partials/search_partial.html", {"query": query, "recipes": recipes})
-    return render(request, "recipes/search.html", {"query": query, "recipes": recipes})
\ No newline at end of file
+        return render(request, "recipes/partials/pantry_partial.html", context)
+    return render(request, "recipes/pantry.html", context)
\ No newline at end of file
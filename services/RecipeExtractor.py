@@ -1,17 +1,43 @@
+import hashlib
 import json
+import threading
+from pathlib import Path
+
 import langextract as lx
 from langextract.data import ExampleData, Extraction
 
+from services.extractionBackends import BACKENDS, LangExtractBackend
+
+PROMPT_DIR = Path(__file__).resolve().parent / "prompt"
+
 
 class RecipeExtractor:
-    def __init__(self, api_key: str, model: str = "gemini-2.5-flash"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gemini-2.5-flash",
+        prompt_dir: Path = PROMPT_DIR,
+        backend=None,
+    ):
         self.api_key = api_key
         self.model = model
+        self.backend = backend or LangExtractBackend(api_key, model)
+        self.examples_path = prompt_dir / "examples.json"
+        self.prompt_path = prompt_dir / "prompt.txt"
+        self._lock = threading.Lock()
+        self._load()
+
+    def _assetMtimes(self):
+        return (self.examples_path.stat().st_mtime_ns, self.prompt_path.stat().st_mtime_ns)
 
-        with open("services/prompt/examples.json", "r", encoding="utf-8") as f:
-            raw_examples = json.load(f)
+    def _load(self):
+        mtimes = self._assetMtimes()
 
-        self.examples = []
+        with open(self.examples_path, "r", encoding="utf-8") as f:
+            raw_examples_text = f.read()
+        raw_examples = json.loads(raw_examples_text)
+
+        examples = []
         for ex in raw_examples:
             extractions = [
                 Extraction(
@@ -20,18 +46,71 @@ class RecipeExtractor:
                 )
                 for e in ex["extractions"]
             ]
-            self.examples.append(ExampleData(text=ex["text"], extractions=extractions))
+            examples.append(ExampleData(text=ex["text"], extractions=extractions))
+
+        with open(self.prompt_path, "r", encoding="utf-8") as f:
+            prompt = f.read()
+
+        self.examples = examples
+        self.prompt = prompt
+        # ändert sich bei jeder inhaltlichen Änderung von prompt.txt oder examples.json
+        self.prompt_version = hashlib.sha256(
+            (prompt + "\0" + raw_examples_text).encode("utf-8")
+        ).hexdigest()
+        self._mtimes = mtimes
 
-        with open("services/prompt/prompt.txt", "r", encoding="utf-8") as f:
-            self.prompt = f.read()
+    def reloadIfChanged(self):
+        """
+        Lädt prompt.txt und examples.json neu, falls sie seit dem letzten Laden
+        geändert wurden.
+        """
+        if self._assetMtimes() != self._mtimes:
+            with self._lock:
+                if self._assetMtimes() != self._mtimes:
+                    self._load()
 
     def extract_recipe(self, text: str):
-        result = lx.extract(
-            text_or_documents=text,
-            prompt_description=self.prompt,
-            model_id=self.model,
-            examples=self.examples,
-            api_key=self.api_key,
-        )
-
-        return result
+        return self.extract_recipes({0: text}, max_workers=1)[0]
+
+    def extract_recipes(self, texts: dict, max_workers: int = 10) -> dict:
+        """
+        Extrahiert mehrere Texte in einem Aufruf des Backends, das bis zu
+        `max_workers` Anfragen parallel an das Modell stellt. `texts` bildet
+        beliebige Schlüssel auf Texte ab, das Ergebnis dieselben Schlüssel auf
+        das jeweilige AnnotatedDocument (None, falls keins zurückkam).
+        """
+        self.reloadIfChanged()
+        documents = [
+            lx.data.Document(text=text, document_id=str(key)) for key, text in texts.items()
+        ]
+        results = self.backend.annotate(documents, self.prompt, self.examples, max_workers)
+
+        by_id = {doc.document_id: doc for doc in results}
+        return {key: by_id.get(str(key)) for key in texts}
+
+
+_extractors = {}
+_extractors_lock = threading.Lock()
+
+
+def getRecipeExtractor(
+    api_key: str, model: str = "gemini-2.5-flash", backend: str = "langextract", **options
+) -> RecipeExtractor:
+    """
+    Gibt den prozessweiten RecipeExtractor für `backend` und `model` zurück und
+    legt ihn beim ersten Aufruf an, statt Prompt und Beispiele bei jedem Import
+    neu zu parsen. `options` gehen an den Konstruktor des Backends.
+    """
+    key = (backend, model, tuple(sorted(options.items())))
+    extractor = _extractors.get(key)
+    if extractor is None or extractor.api_key != api_key:
+        with _extractors_lock:
+            extractor = _extractors.get(key)
+            if extractor is None or extractor.api_key != api_key:
+                extractor = RecipeExtractor(
+                    api_key=api_key,
+                    model=model,
+                    backend=BACKENDS[backend](api_key=api_key, model=model, **options),
+                )
+                _extractors[key] = extractor
+    return extractor
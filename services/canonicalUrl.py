@@ -0,0 +1,69 @@
+import re
+from urllib.parse import urlsplit
+
+import requests
+
+from services import httpClient
+
+TIKTOK_VIDEO_RE = re.compile(r"/(?:video|photo|v)/(\d+)")
+TIKTOK_SHORT_HOSTS = {"vm.tiktok.com", "vt.tiktok.com"}
+TIKTOK_SHORT_PATH_RE = re.compile(r"^/t/\w+")
+INSTAGRAM_SHORTCODE_RE = re.compile(r"^/(?:[\w.]+/)?(?:p|reel|reels|tv)/([\w-]+)")
+
+
+def _withScheme(url):
+    return url if "://" in url else f"https://{url}"
+
+
+def _host(url):
+    host = urlsplit(url).hostname or ""
+    return host.removeprefix("www.").removeprefix("m.")
+
+
+def isShortLink(url):
+    url = _withScheme(url)
+    host = _host(url)
+    return host in TIKTOK_SHORT_HOSTS or (
+        host == "tiktok.com" and bool(TIKTOK_SHORT_PATH_RE.match(urlsplit(url).path))
+    )
+
+
+def resolveShortLink(url):
+    """
+    Folgt den Weiterleitungen eines TikTok-Kurzlinks (vm.tiktok.com/..., tiktok.com/t/...)
+    bis zur eigentlichen Video-URL. Gibt bei Fehlern None zurück.
+    """
+    try:
+        response = httpClient.head(url, allow_redirects=True)
+    except (requests.RequestException, httpClient.CircuitOpenError):
+        return None
+    return response.url
+
+
+def canonicalKey(url, resolve=True):
+    """
+    Plattformunabhängiger Schlüssel eines Videos, z.B. "tiktok:7312345678901234567"
+    oder "instagram:C1a2B3c4D5e". Query-Strings, Benutzernamen im Pfad und
+    Kurzlinks (mit `resolve`) ergeben denselben Schlüssel. None, wenn die URL
+    kein erkennbares Video ist.
+    """
+    url = (url or "").strip()
+    if not url:
+        return None
+    url = _withScheme(url)
+    host = _host(url)
+
+    if host.endswith("tiktok.com"):
+        if isShortLink(url):
+            resolved = resolveShortLink(url) if resolve else None
+            if not resolved or isShortLink(resolved):
+                return None
+            url = resolved
+        match = TIKTOK_VIDEO_RE.search(urlsplit(url).path)
+        return f"tiktok:{match.group(1)}" if match else None
+
+    if host.endswith("instagram.com"):
+        match = INSTAGRAM_SHORTCODE_RE.match(urlsplit(url).path)
+        return f"instagram:{match.group(1)}" if match else None
+
+    return None
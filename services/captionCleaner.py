@@ -0,0 +1,84 @@
+import re
+import unicodedata
+
+from services.captionParser import INGREDIENTS_HEADER_RE, INSTRUCTIONS_HEADER_RE
+
+# grobe Schätzung für Gemini: etwa vier Zeichen je Token, auch für deutschen Text
+CHARS_PER_TOKEN = 4
+
+URL_RE = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+MENTION_RE = re.compile(r"(?<![\w.])@[\w.]+")
+HASHTAG_RE = re.compile(r"(?<!\w)#\w+")
+# Emoji, Flaggen, Varianten-Selektoren und Joiner; "°" und Brüche wie "½" bleiben stehen
+EMOJI_RE = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27bf\u2b00-\u2bff\ufe0e\ufe0f\u200d\u20e3]+")
+# typische Aufforderungen, die mit dem Rezept nichts zu tun haben; nur mit
+# Social-Media-Bezug, damit Schritte wie "Teile das Hackfleisch" stehen bleiben
+CTA_RE = re.compile(
+    r"\b(?:folg(?:e|t)\s+(?:mir|uns)|link\s+in\s+(?:der\s+)?bio"
+    r"|speicher(?:e|t|n)?\s+(?:dir\s+)?(?:das|dieses|den|diesen)\s+(?:rezept|post|video|reel)"
+    r"|für\s+später\s+speichern|abonnier"
+    r"|kommentier(?:e|t)?\s+(?:mit|unten|gerne?|\S+\s+für)"
+    r"|teil(?:e|t)\s+(?:das|dieses|den|diesen)\s+(?:rezept|video|reel|post)|teil(?:e|t)\s+es\s+mit"
+    r"|markier(?:e|t)\s+(?:eine?n?|deine?n?|die)\s+(?:freund|person|mitbewohner|partner|lieblings|schatz)"
+    r"|follow\s+(?:me|us|for)|save\s+(?:this|for\s+later)|like\s+(?:and|&)\s+share"
+    r"|comment\s+(?:below|\S+\s+for)|tag\s+a\s+friend|turn\s+on\s+notifications)",
+    re.IGNORECASE,
+)
+# längere Zeilen mit CTA-Wörtern sind eher Rezepttext und bleiben stehen
+MAX_CTA_LINE_LENGTH = 100
+
+
+def estimateTokens(text):
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+
+def _cleanLine(line):
+    line = URL_RE.sub(" ", line)
+    line = MENTION_RE.sub(" ", line)
+    line = HASHTAG_RE.sub(" ", line)
+    line = EMOJI_RE.sub(" ", line)
+    line = " ".join(line.split())
+    # übrig gebliebene Aufzählungszeichen aus Emoji-Listen
+    return line.strip(" -•·|")
+
+
+def cleanCaption(text, max_tokens=None):
+    """
+    Entfernt Links, @-Erwähnungen, Hashtags, Emoji und Aufforderungen wie
+    "Folgt mir für mehr" aus einer Video-Beschreibung, streicht doppelte Zeilen
+    und kürzt auf `max_tokens` (geschätzt). Zeilenumbrüche bleiben erhalten,
+    damit Abschnitte wie "Zutaten:" erkennbar bleiben.
+
+    In den Abschnitten Zutaten und Zubereitung werden nur direkt aufeinander
+    folgende Wiederholungen gestrichen: "1 Prise Salz" kann für Teig und Soße
+    je einmal vorkommen.
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    lines, seen = [], set()
+    previous, in_section = None, False
+    for raw_line in text.splitlines():
+        line = _cleanLine(raw_line)
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if len(line) <= MAX_CTA_LINE_LENGTH and CTA_RE.search(line):
+            continue
+        key = line.lower()
+        if key == previous or (not in_section and key in seen):
+            continue
+        if INGREDIENTS_HEADER_RE.match(line) or INSTRUCTIONS_HEADER_RE.match(line):
+            in_section = True
+        seen.add(key)
+        previous = key
+        lines.append(line)
+    cleaned = "\n".join(lines).strip()
+
+    if max_tokens is not None:
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        if len(cleaned) > max_chars:
+            # möglichst an einer Zeilen- oder Wortgrenze abschneiden
+            cut = cleaned[:max_chars]
+            boundary = max(cut.rfind("\n"), cut.rfind(" "))
+            cleaned = (cut[:boundary] if boundary > max_chars // 2 else cut).rstrip()
+    return cleaned
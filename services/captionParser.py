@@ -0,0 +1,194 @@
+import re
+
+INGREDIENTS_HEADER_RE = re.compile(
+    r"^(?:zutaten|ingredients|du brauchst|was du brauchst|einkaufsliste)\b[^:]{0,40}:?\s*(?P<rest>.*)$",
+    re.IGNORECASE,
+)
+INSTRUCTIONS_HEADER_RE = re.compile(
+    r"^(?:zubereitung|anleitung|so geht'?s|so wird'?s gemacht|schritte|instructions|method|directions)\b[^:]{0,40}:?\s*(?P<rest>.*)$",
+    re.IGNORECASE,
+)
+
+UNITS = {
+    "g": "g", "gr": "g", "gramm": "g", "kg": "kg", "mg": "mg",
+    "ml": "ml", "cl": "cl", "dl": "dl", "l": "l", "liter": "l",
+    "el": "EL", "tl": "TL", "msp": "Msp",
+    "prise": "Prise", "prisen": "Prise", "bund": "Bund", "zehe": "Zehe", "zehen": "Zehe",
+    "stk": "Stück", "stück": "Stück", "scheibe": "Scheibe", "scheiben": "Scheibe",
+    "dose": "Dose", "dosen": "Dose", "becher": "Becher", "packung": "Packung",
+    "pck": "Packung", "päckchen": "Packung", "tasse": "Tasse", "tassen": "Tasse",
+    "handvoll": "Handvoll", "glas": "Glas",
+    "cup": "cup", "cups": "cup", "tbsp": "tbsp", "tsp": "tsp", "oz": "oz", "lb": "lb",
+}
+FRACTIONS = {"½": 0.5, "¼": 0.25, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3}
+
+FRACTION = r"[½¼¾⅓⅔]"
+# "1.000" ist im Deutschen Tausend, "1.5" und "1,5" sind Dezimalzahlen
+THOUSANDS = r"[1-9]\d{0,2}(?:\.\d{3})+(?![\d.,])"
+NUMBER = rf"{THOUSANDS}|\d+(?:[.,]\d+)?"
+# gemischte Zahlen ("1½", "1 1/2") vor einfachen Zahlen und Brüchen
+QUANTITY = rf"\d+\s*{FRACTION}|\d+\s+\d+\s*/\s*\d+|(?:{NUMBER})(?:\s*/\s*\d+)?|{FRACTION}"
+UNIT = rf"(?:{'|'.join(sorted(map(re.escape, UNITS), key=len, reverse=True))})"
+INGREDIENT_RE = re.compile(
+    r"^(?:[-*•·]\s*)?"
+    # "ca. 200 ml", "etwa 2 EL"
+    rf"(?:(?:ca\.|circa|etwa|ungefähr|approx\.?|about)\s*(?=\d|{FRACTION}))?"
+    # "3 x 200 g"
+    r"(?:(?P<count>\d+)\s*[x×]\s*(?=\d))?"
+    rf"(?P<quantity>(?:{QUANTITY})(?:\s*[-–]\s*(?:{QUANTITY}))?)?\s*"
+    rf"(?P<unit>{UNIT}\.?(?=\s|$))?\s*"
+    r"(?P<name>.*?)\s*$",
+    re.IGNORECASE,
+)
+MIXED_NUMBER_RE = re.compile(rf"(?P<whole>\d+)(?:\s*(?={FRACTION})|\s+(?=\d+\s*/))(?P<fraction>.+)")
+# Namen, in denen noch Mengen- oder Einheitstext steckt: die Zeile ist nicht verstanden
+LEFTOVER_QUANTITY_RE = re.compile(rf"^(?:\d|{FRACTION}|[x×](?:\s|$))")
+LEFTOVER_UNIT_RE = re.compile(rf"^(?P<unit>{UNIT})\.?(?:\s|$)", re.IGNORECASE)
+STEP_NUMBER_RE = re.compile(r"^(?:schritt\s*\d+\s*[:.)]?|step\s*\d+\s*[:.)]?|\d+\s*[.):]|[-*•·])\s*", re.IGNORECASE)
+SERVINGS_RE = re.compile(r"\bfür\s+(\d+)\s+(?:portionen|personen|stück)\b|\bserves\s+(\d+)\b", re.IGNORECASE)
+PREP_TIME_RE = re.compile(r"\b(?:vorbereitung|vorbereitungszeit|prep(?:\s*time)?)\s*:?\s*(\d+\s*(?:min\w*|std\w*|h))", re.IGNORECASE)
+COOK_TIME_RE = re.compile(r"\b(?:koch|back|gar|cook)\w*\s*:?\s*(\d+\s*(?:min\w*|std\w*|h))", re.IGNORECASE)
+
+# Anteile an der Konfidenz, zusammen 1.0
+WEIGHT_TITLE = 0.1
+WEIGHT_INGREDIENTS = 0.3
+WEIGHT_INSTRUCTIONS = 0.3
+WEIGHT_QUANTIFIED = 0.3
+
+
+def _parseNumber(text):
+    text = text.strip()
+    if text in FRACTIONS:
+        return FRACTIONS[text]
+    if re.fullmatch(THOUSANDS, text):
+        return float(text.replace(".", ""))
+    if "/" in text:
+        numerator, denominator = (float(part.replace(",", ".")) for part in text.split("/"))
+        return numerator / denominator if denominator else None
+    return float(text.replace(",", "."))
+
+
+def _parseQuantity(text):
+    # bei Spannen wie "2-3" zählt der erste Wert
+    text = re.split(r"\s*[-–]\s*", text.strip())[0]
+    mixed = MIXED_NUMBER_RE.fullmatch(text)
+    if mixed:
+        fraction = _parseNumber(mixed.group("fraction"))
+        return float(mixed.group("whole")) + fraction if fraction is not None else None
+    return _parseNumber(text)
+
+
+def _isUnitSpelling(token):
+    """
+    "EL", "el", "Prise" und "Liter" sind Einheiten, "El" wie in "El Paso" nicht.
+    """
+    return (
+        token.islower()
+        or token.isupper()
+        or token == UNITS[token.lower()]
+        or (len(token) > 2 and token == token.capitalize())
+    )
+
+
+def parseIngredient(line):
+    """
+    Zerlegt eine Zeile wie "200 g Mehl" in {"name", "quantity", "unit"}. Bleibt
+    nach Menge und Einheit kein Name übrig ("200 g"), ist der Name leer und die
+    Zeile wird nicht als Zutat übernommen.
+
+    Versteht auch "1½ TL", "1 1/2 TL", "1.000 g", "ca. 200 ml" und "3 x 200 g"
+    (600 g). Auf eine Einheit muss ein Leerzeichen folgen; ein Wort wie "El" vor
+    einem großgeschriebenen Wort ("El Paso Sauce") gehört zum Namen.
+    """
+    match = INGREDIENT_RE.match(line)
+    name = match.group("name").strip(" ,;")
+    quantity = _parseQuantity(match.group("quantity")) if match.group("quantity") else None
+    if quantity is not None and match.group("count"):
+        quantity *= int(match.group("count"))
+    unit = match.group("unit")
+    if unit and name[:1].isupper() and not _isUnitSpelling(unit.rstrip(".")):
+        name, unit = line[match.start("unit"):].strip(" ,;"), None
+    if unit:
+        unit = UNITS[unit.rstrip(".").lower()]
+    elif quantity is None:
+        name = line.strip(" -*•·,;")
+    return {"name": name, "quantity": quantity, "unit": unit}
+
+
+def _hasLeftover(ingredient):
+    """
+    True, wenn im Namen noch Menge oder Einheit steckt ("½ TL Zucker") oder eine
+    Menge ohne Zutat übrig blieb ("200 g").
+    """
+    name = ingredient["name"]
+    if not name:
+        return ingredient["quantity"] is not None or ingredient["unit"] is not None
+    if LEFTOVER_QUANTITY_RE.match(name):
+        return True
+    unit = LEFTOVER_UNIT_RE.match(name)
+    # "El Paso Sauce" ohne Menge ist ein Name, "2 Kg Kartoffeln" nicht verstanden
+    return bool(unit) and (ingredient["quantity"] is not None or _isUnitSpelling(unit.group("unit")))
+
+
+def parseCaption(text):
+    """
+    Liest Beschreibungen mit klaren Abschnitten "Zutaten:" und "Zubereitung:"
+    ohne Sprachmodell. Gibt (Rezept-Dict, Konfidenz zwischen 0 und 1) zurück;
+    das Dict hat dieselbe Form wie das Ergebnis der LLM-Extraktion.
+    """
+    lines = [line.strip() for line in (text or "").splitlines()]
+    intro, ingredient_lines, instruction_lines = [], [], []
+    section = intro
+    for line in lines:
+        if not line:
+            continue
+        header = INGREDIENTS_HEADER_RE.match(line)
+        if header:
+            section = ingredient_lines
+        else:
+            header = INSTRUCTIONS_HEADER_RE.match(line)
+            if header:
+                section = instruction_lines
+        if header:
+            # "Zutaten: 200 g Mehl, 2 Eier" in einer Zeile
+            rest = header.group("rest").strip()
+            if rest and section is ingredient_lines:
+                section.extend(part.strip() for part in rest.split(",") if part.strip())
+            elif rest:
+                section.append(rest)
+            continue
+        section.append(line)
+
+    parsed = [parseIngredient(line) for line in ingredient_lines]
+    ingredients = [ing for ing in parsed if ing["name"]]
+    # nicht verstandene Zeilen ("200 g", "½ TL Zucker"): das Sprachmodell soll ran
+    unparsed = any(_hasLeftover(ing) for ing in parsed)
+    instructions = [STEP_NUMBER_RE.sub("", line).strip() for line in instruction_lines]
+    instructions = [step for step in instructions if step]
+
+    title = intro[0].rstrip("!?.:") if intro else ""
+    description = " ".join(intro[1:])
+    servings = SERVINGS_RE.search(text or "")
+    prep_time = PREP_TIME_RE.search(text or "")
+    cook_time = COOK_TIME_RE.search(text or "")
+
+    recipe = {
+        "title": title,
+        "description": description,
+        "prep_time": prep_time.group(1) if prep_time else "",
+        "cook_time": cook_time.group(1) if cook_time else "",
+        "servings": next(group for group in servings.groups() if group) if servings else "",
+        "ingredients": ingredients,
+        "instructions": instructions,
+    }
+
+    if not ingredients or unparsed:
+        return recipe, 0.0
+    quantified = sum(ing["quantity"] is not None or ing["unit"] is not None for ing in ingredients)
+    confidence = (
+        WEIGHT_TITLE * bool(title)
+        + WEIGHT_INGREDIENTS
+        + WEIGHT_INSTRUCTIONS * bool(instructions)
+        + WEIGHT_QUANTIFIED * quantified / len(ingredients)
+    )
+    return recipe, round(confidence, 2)
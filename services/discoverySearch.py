@@ -0,0 +1,228 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+import numpy as np
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from recipes.models import RecipeSearchIndex, UserProfile
+from services.searchRecipes import normalize, scoreEntries
+
+logger = logging.getLogger(__name__)
+
+# Je Shard: (Einträge (recipe_id, title, ingredients), user_ids als Array).
+# Anfragen lesen immer die zuletzt fertig gebaute Fassung; ein Neuaufbau läuft
+# im Hintergrund und tauscht die Shards erst aus, wenn er fertig ist.
+_state = {
+    "shards": None, "built_at": 0.0, "user_ids": frozenset(), "size": 0,
+    "generation": 0, "snapshot": None, "rebuilding": False,
+}
+_lock = threading.Lock()
+
+# Der Prozess-Pool wird einmal gestartet und bleibt über alle Neuaufbauten
+# bestehen. Die Worker erben nichts vom Webprozess (kein fork neben den
+# Import-Threads), sondern lesen die Shards einer Fassung einmal aus einer
+# Snapshot-Datei; pro Anfrage werden nur die Suchbegriffe übertragen.
+_pool = None
+_pool_lock = threading.Lock()
+_snapshot_dir = None
+# im Worker-Prozess: zuletzt gelesener Snapshot
+_worker_shards = {"snapshot": None, "shards": None}
+
+
+def _publicUserIds():
+    return frozenset(
+        UserProfile.objects.filter(public_profile=True).values_list("user_id", flat=True)
+    )
+
+
+def _buildShards(user_ids):
+    shards = [([], []) for _ in range(settings.DISCOVERY_SHARDS)]
+    entries = (
+        RecipeSearchIndex.objects.filter(user_id__in=user_ids)
+        .order_by("recipe_id")
+        .values_list("recipe_id", "user_id", "title", "ingredients")
+        .iterator(chunk_size=2000)
+    )
+    for recipe_id, user_id, title, ingredients in entries:
+        shard_entries, shard_users = shards[recipe_id % len(shards)]
+        shard_entries.append((recipe_id, title, ingredients))
+        shard_users.append(user_id)
+    return [(shard_entries, np.array(shard_users, dtype=np.int64)) for shard_entries, shard_users in shards]
+
+
+def _getPool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # forkserver/spawn statt fork: der Webprozess hat schon Import- und Thumbnail-Threads
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.DISCOVERY_WORKERS, mp_context=context, initializer=django.setup
+            )
+    return _pool
+
+
+def _resetPool(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _writeSnapshot(generation, shards):
+    global _snapshot_dir
+    if _snapshot_dir is None:
+        _snapshot_dir = tempfile.mkdtemp(prefix="smartcook-discovery-")
+        atexit.register(shutil.rmtree, _snapshot_dir, ignore_errors=True)
+    path = os.path.join(_snapshot_dir, f"shards-{os.getpid()}-{generation}.pickle")
+    with open(path, "wb") as snapshot:
+        pickle.dump(shards, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def rebuildShards(public_ids=None):
+    """
+    Baut die Shards aus dem Suchindex neu und tauscht sie danach aus. Bis dahin
+    beantworten Anfragen weiter die alte Fassung.
+    """
+    if public_ids is None:
+        public_ids = _publicUserIds()
+    shards = _buildShards(public_ids)
+    size = sum(len(entries) for entries, users in shards)
+    with _lock:
+        _state["generation"] += 1
+        generation = _state["generation"]
+    snapshot = _writeSnapshot(generation, shards) if size >= settings.DISCOVERY_INLINE_THRESHOLD else None
+
+    with _lock:
+        old_snapshot = _state["snapshot"]
+        _state.update(
+            shards=shards, built_at=time.monotonic(), user_ids=public_ids, size=size, snapshot=snapshot
+        )
+    # laufende Anfragen haben den alten Snapshot schon gelesen oder fallen auf lokal zurück
+    if old_snapshot is not None:
+        try:
+            os.remove(old_snapshot)
+        except OSError:
+            pass
+
+
+def _rebuildInBackground(public_ids):
+    close_old_connections()
+    try:
+        rebuildShards(public_ids)
+    except Exception:
+        logger.exception("Neuaufbau der Discovery-Shards fehlgeschlagen")
+    finally:
+        with _lock:
+            _state["rebuilding"] = False
+        close_old_connections()
+
+
+def _refresh(public_ids):
+    """
+    Startet einen Neuaufbau, wenn die Shards älter als DISCOVERY_REFRESH_SECONDS
+    sind oder neue öffentliche Profile dazugekommen sind. Nur der allererste
+    Aufbau läuft auf dem Anfragepfad, alle weiteren im Hintergrund.
+    """
+    with _lock:
+        expired = time.monotonic() - _state["built_at"] > settings.DISCOVERY_REFRESH_SECONDS
+        if _state["shards"] is not None and (
+            _state["rebuilding"] or (not expired and public_ids <= _state["user_ids"])
+        ):
+            return
+        initial = _state["shards"] is None
+        if not initial:
+            _state["rebuilding"] = True
+
+    if initial:
+        rebuildShards(public_ids)
+    else:
+        threading.Thread(
+            target=_rebuildInBackground, args=(public_ids,), name="discovery-rebuild", daemon=True
+        ).start()
+
+
+def scoreShard(shard, terms, limit, excluded_user_ids):
+    """
+    Bewertet einen Shard und gibt seine besten `limit` Treffer als
+    [(score, recipe_id)] zurück.
+    """
+    entries, user_ids = shard
+    if excluded_user_ids:
+        keep = np.flatnonzero(~np.isin(user_ids, list(excluded_user_ids)))
+        entries = [entries[i] for i in keep]
+
+    positions, scores = scoreEntries(terms, entries, workers=1)
+    recipe_ids = np.array([entries[i][0] for i in positions], dtype=np.int64)
+    order = np.lexsort((recipe_ids, -scores))[:limit]
+    return [(float(scores[i]), int(recipe_ids[i])) for i in order]
+
+
+def scoreSnapshotShard(snapshot, shard_number, terms, limit, excluded_user_ids):
+    """
+    Wie scoreShard, aber im Worker-Prozess: die Shards einer Fassung werden
+    einmal aus dem Snapshot gelesen und bis zur nächsten Fassung behalten.
+    """
+    if _worker_shards["snapshot"] != snapshot:
+        with open(snapshot, "rb") as data:
+            _worker_shards.update(snapshot=snapshot, shards=pickle.load(data))
+    return scoreShard(_worker_shards["shards"][shard_number], terms, limit, excluded_user_ids)
+
+
+def discoverRecipes(user, query, limit):
+    """
+    Sucht in den Rezepten aller öffentlichen Profile (außer den eigenen) und gibt
+    die besten `limit` Treffer als [(recipe_id, score)] zurück.
+
+    Wer sein Profil auf privat stellt, fällt sofort heraus: die öffentlichen
+    Profile werden bei jeder Anfrage neu gelesen und alle anderen im Worker
+    herausgefiltert, auch wenn die Shards noch älter sind. Neue öffentliche
+    Profile erscheinen nach dem nächsten Neuaufbau im Hintergrund.
+    """
+    terms = [normalize(term) for term in query.split()]
+    if not terms:
+        return []
+
+    public_ids = _publicUserIds()
+    _refresh(public_ids)
+    with _lock:
+        shards, snapshot, built_for = _state["shards"], _state["snapshot"], _state["user_ids"]
+    excluded = (built_for - public_ids) | {user.id}
+
+    shard_results = None
+    if snapshot is not None:
+        pool = _getPool()
+        try:
+            futures = [
+                pool.submit(scoreSnapshotShard, snapshot, n, terms, limit, excluded)
+                for n in range(len(shards))
+            ]
+            shard_results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            logger.warning("Discovery-Pool abgestürzt, starte ihn neu")
+            _resetPool(pool)
+        except (RuntimeError, CancelledError, OSError):
+            # Snapshot wurde gerade durch einen neueren ersetzt
+            shard_results = None
+    if shard_results is None:
+        shard_results = [scoreShard(shard, terms, limit, excluded) for shard in shards]
+
+    merged = sorted(
+        (hit for hits in shard_results for hit in hits), key=lambda hit: (-hit[0], hit[1])
+    )
+    return [(recipe_id, score) for score, recipe_id in merged[:limit]]
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import math
+import random
+import time
+
+import langextract as lx
+from langextract.data import AnnotatedDocument, Extraction
+
+from services.recipeCorpus import generateRecipe
+
+
+class LangExtractBackend:
+    """
+    Schickt die Dokumente über langextract an das Sprachmodell (Gemini).
+    Weitere Schlüsselwörter (z.B. temperature) werden an lx.extract durchgereicht.
+    """
+
+    name = "langextract"
+
+    def __init__(self, api_key, model, **options):
+        self.api_key = api_key
+        self.model = model
+        self.options = options
+
+    def annotate(self, documents, prompt, examples, max_workers):
+        return lx.extract(
+            text_or_documents=documents,
+            prompt_description=prompt,
+            model_id=self.model,
+            examples=examples,
+            api_key=self.api_key,
+            max_workers=max_workers,
+            batch_length=max_workers,
+            **self.options,
+        )
+
+
+class FakeBackend:
+    """
+    Lokaler Ersatz für Last- und Benchmark-Tests ohne API-Schlüssel: liefert zu
+    jedem Text immer dasselbe erfundene Rezept und wartet dabei `latency`
+    Sekunden je Runde von `max_workers` parallelen Anfragen.
+    """
+
+    name = "fake"
+
+    def __init__(self, api_key=None, model=None, latency=0.0):
+        self.model = model
+        self.latency = float(latency)
+
+    def recipeFor(self, text):
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).hexdigest())
+        return generateRecipe(rng, "de")
+
+    def annotate(self, documents, prompt, examples, max_workers):
+        documents = list(documents)
+        if self.latency:
+            time.sleep(self.latency * math.ceil(len(documents) / max(max_workers, 1)))
+        return [
+            AnnotatedDocument(
+                document_id=doc.document_id,
+                text=doc.text,
+                extractions=[
+                    Extraction(
+                        extraction_class="Recipe",
+                        extraction_text=json.dumps(self.recipeFor(doc.text), ensure_ascii=False),
+                    )
+                ],
+            )
+            for doc in documents
+        ]
+
+
+BACKENDS = {backend.name: backend for backend in (LangExtractBackend, FakeBackend)}
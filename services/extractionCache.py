@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from recipes.models import ExtractionCache
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(kind):
+    with _stats_lock:
+        _stats[kind] += 1
+
+
+def normalizeCaption(text):
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def extractionCacheKey(text, model, prompt_version):
+    """
+    Inhaltsadresse einer Extraktion: gleicher Text mit gleichem Prompt und Modell
+    ergibt denselben Schlüssel. Ändern sich prompt.txt oder examples.json, ändert
+    sich die Prompt-Version und alte Einträge werden nicht mehr getroffen.
+    """
+    payload = "\0".join((model, prompt_version, normalizeCaption(text)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def getCachedExtraction(key):
+    entry = ExtractionCache.objects.filter(key=key).values_list("recipe", flat=True).first()
+    if entry is None:
+        _count("misses")
+        return None
+
+    _count("hits")
+    ExtractionCache.objects.filter(key=key).update(
+        hits=F("hits") + 1, last_used_at=timezone.now()
+    )
+    return entry
+
+
+def storeExtraction(key, recipe_dict):
+    ExtractionCache.objects.update_or_create(
+        key=key, defaults={"recipe": recipe_dict, "last_used_at": timezone.now()}
+    )
+    evictExtractions()
+
+
+def evictExtractions(max_entries=None):
+    """
+    Löscht die am längsten nicht genutzten Einträge über EXTRACTION_CACHE_MAX_ENTRIES.
+    """
+    if max_entries is None:
+        max_entries = settings.EXTRACTION_CACHE_MAX_ENTRIES
+    surplus = ExtractionCache.objects.count() - max_entries
+    if surplus <= 0:
+        return 0
+    oldest = list(
+        ExtractionCache.objects.order_by("last_used_at").values_list("id", flat=True)[:surplus]
+    )
+    ExtractionCache.objects.filter(id__in=oldest).delete()
+    return len(oldest)
+
+
+def extractionCacheStats():
+    """
+    Treffer/Fehlschläge dieses Prozesses; steht in jeder Import-Logzeile.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
@@ -1,24 +1,144 @@
+import logging
+import threading
+from collections import OrderedDict
+
 import instaloader
+from instaloader.exceptions import (
+    ConnectionException,
+    InstaloaderException,
+    QueryReturnedNotFoundException,
+)
+
+from django.conf import settings
+from django.utils import timezone
+
+from services.canonicalUrl import canonicalKey
+from services.thumbnailExpiry import thumbnailExpiry
+from services.tokenBucket import RateLimited, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_loader = None
+# instaloader ist nicht threadsicher: Abfragen laufen nacheinander über diesen Lock
+_loader_lock = threading.Lock()
+_bucket = None
+_bucket_lock = threading.Lock()
+
+_captions = OrderedDict()
+_captions_lock = threading.Lock()
+
+
+class InstagramUnavailable(Exception):
+    """
+    Instagram drosselt oder ist nicht erreichbar; später erneut versuchen.
+    """
+
+
+def _getBucket():
+    global _bucket
+    with _bucket_lock:
+        if _bucket is None:
+            _bucket = TokenBucket(
+                settings.INSTAGRAM_REQUESTS_PER_MINUTE / 60, settings.INSTAGRAM_BURST
+            )
+    return _bucket
 
-def getInstaDesc(url: str) -> str:
+
+def _getLoader():
+    global _loader
+    if _loader is None:
+        loader = instaloader.Instaloader(
+            download_pictures=False,
+            download_videos=False,
+            download_comments=False,
+            save_metadata=False,
+            quiet=True,
+            # nicht minutenlang intern warten, die Wiederholung übernimmt der Import-Job
+            max_connection_attempts=1,
+            request_timeout=settings.HTTP_READ_TIMEOUT,
+        )
+        if settings.INSTAGRAM_SESSION_USER:
+            try:
+                loader.load_session_from_file(
+                    settings.INSTAGRAM_SESSION_USER, settings.INSTAGRAM_SESSION_FILE or None
+                )
+                logger.info("Instagram-Session von %s geladen", settings.INSTAGRAM_SESSION_USER)
+            except FileNotFoundError:
+                logger.warning("Keine Instagram-Session-Datei gefunden, frage anonym ab")
+        _loader = loader
+    return _loader
+
+
+def shortcodeFromUrl(url):
+    key = canonicalKey(url, resolve=False)
+    if key and key.startswith("instagram:"):
+        return key.split(":", 1)[1]
+    return url.split("?")[0].rstrip("/").split("/")[-1]
+
+
+def _cached(shortcode):
+    with _captions_lock:
+        result = _captions.get(shortcode)
+        if result is None:
+            return None
+        # die signierte Bild-URL ist abgelaufen: Eintrag ist wertlos
+        expires_at = thumbnailExpiry(result[1])
+        if expires_at is not None and expires_at <= timezone.now():
+            del _captions[shortcode]
+            return None
+        _captions.move_to_end(shortcode)
+        return result
+
+
+def _remember(shortcode, result):
+    with _captions_lock:
+        _captions[shortcode] = result
+        while len(_captions) > settings.INSTAGRAM_CACHE_SIZE:
+            _captions.popitem(last=False)
+
+
+def getInstaDesc(url: str, use_cache=True):
     """
     Extrahiert die Beschreibung eines öffentlichen Instagram-Reels über instaloader.
     Funktioniert zuverlässig bei öffentlichen Reels.
+
+    Alle Worker teilen sich einen Instaloader und ein Token-Bucket, damit
+    Instagram bei vielen Importen nicht drosselt. Gibt (Beschreibung, Bild-URL)
+    zurück oder None, wenn der Beitrag nicht (öffentlich) existiert; bei
+    Drosselung wird InstagramUnavailable ausgelöst. Mit use_cache=False wird
+    immer neu abgefragt, z.B. um ein abgelaufenes Vorschaubild zu erneuern.
     """
-    shortcode = url.rstrip("/").split("/")[-1]
-    loader = instaloader.Instaloader(
-        download_pictures=False,
-        download_videos=False,
-        download_comments=False,
-        save_metadata=False,
-        quiet=True
-    )
+    shortcode = shortcodeFromUrl(url)
+    result = _cached(shortcode) if use_cache else None
+    if result is not None:
+        return result
 
+    # außerhalb des Loader-Locks warten, sonst reihen sich alle Wartenden am Lock
+    # auf und INSTAGRAM_MAX_WAIT greift nie
     try:
-        post = instaloader.Post.from_shortcode(loader.context, shortcode)
-        print(post)
-        print(post.url)
-        return (post.caption, post.url) or None
-    except Exception as e:
-        print(f"Fehler: {e}")
-        return None
\ No newline at end of file
+        _getBucket().acquire(timeout=settings.INSTAGRAM_MAX_WAIT)
+    except RateLimited as e:
+        logger.warning("Instagram-Abfrage für %s gedrosselt: %s", shortcode, e)
+        raise InstagramUnavailable(str(e)) from e
+
+    with _loader_lock:
+        loader = _getLoader()
+        # ein anderer Worker hat den Beitrag inzwischen geladen
+        result = _cached(shortcode) if use_cache else None
+        if result is not None:
+            return result
+        try:
+            post = instaloader.Post.from_shortcode(loader.context, shortcode)
+            result = (post.caption, post.url)
+        except QueryReturnedNotFoundException:
+            logger.info("Instagram-Beitrag %s nicht gefunden", shortcode)
+            return None
+        except ConnectionException as e:
+            logger.warning("Instagram-Abfrage für %s fehlgeschlagen: %s", shortcode, e)
+            raise InstagramUnavailable(str(e)) from e
+        except InstaloaderException as e:
+            logger.warning("Instagram-Beitrag %s nicht lesbar: %s", shortcode, e)
+            return None
+
+    _remember(shortcode, result)
+    return result
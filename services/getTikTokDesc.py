@@ -1,12 +1,17 @@
-def getTikTokDesc(url: str) -> str:
-    import requests
+from services import httpClient
 
-    api_url = f"https://www.tiktok.com/oembed?url={url}"
+OEMBED_URL = "https://www.tiktok.com/oembed"
 
-    r = requests.get(api_url)
 
-    data = r.json() 
-    recipe_text = data.get("title", "")
-    thumbnail = data.get("thumbnail_url", "")
+def _parseOembed(response):
+    # 4xx: Video gelöscht oder privat, ein neuer Versuch hilft nicht
+    if 400 <= response.status_code < 500:
+        return ("", "")
+    response.raise_for_status()
+    data = response.json()
+    return (data.get("title", ""), data.get("thumbnail_url", ""))
+
+
+def getTikTokDesc(url: str) -> tuple[str, str]:
+    return _parseOembed(httpClient.get(OEMBED_URL, params={"url": url}))
 
-    return (recipe_text, thumbnail)
@@ -0,0 +1,200 @@
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "SmartCook/1.0"
+
+
+class CircuitOpenError(Exception):
+    """
+    Der Host ist nach zu vielen Fehlern in Folge vorübergehend gesperrt.
+    """
+
+
+class CircuitBreaker:
+    """
+    Nach `threshold` Fehlern in Folge werden Anfragen an den Host für `cooldown`
+    Sekunden sofort abgelehnt, statt Worker in Timeouts hängen zu lassen. Danach
+    darf eine einzelne Probeanfrage durch.
+    """
+
+    def __init__(self, host, threshold, cooldown):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # halb offen: bis zum Ergebnis der Probe bleiben alle anderen gesperrt
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record(self, success):
+        with self._lock:
+            if success:
+                if self.opened_at is not None:
+                    logger.info("HTTP-Sperre für %s aufgehoben", self.host)
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold and self.opened_at is None:
+                logger.warning(
+                    "%s Fehler in Folge bei %s, gesperrt für %s s",
+                    self.failures, self.host, self.cooldown,
+                )
+                self.opened_at = time.monotonic()
+
+
+class HostMetrics:
+    def __init__(self, samples):
+        self.requests = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, success):
+        with self._lock:
+            self.requests += 1
+            self.failures += not success
+            self.latencies.append(seconds * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            count, failures = self.requests, self.failures
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+
+        return {
+            "requests": count,
+            "failures": failures,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+        }
+
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+
+def _hostState(url):
+    host = urlsplit(url).hostname or ""
+    state = _hosts.get(host)
+    if state is None:
+        with _hosts_lock:
+            state = _hosts.setdefault(
+                host,
+                (
+                    CircuitBreaker(host, settings.HTTP_BREAKER_THRESHOLD, settings.HTTP_BREAKER_COOLDOWN),
+                    HostMetrics(settings.HTTP_METRICS_SAMPLES),
+                ),
+            )
+    return state
+
+
+def hostMetrics():
+    """
+    Anfragen, Fehler und Latenz (p50/p95 in ms) je Host seit Prozessstart.
+    """
+    return {host: metrics.snapshot() for host, (breaker, metrics) in list(_hosts.items())}
+
+
+_metrics_logged_at = {"at": time.monotonic()}
+
+
+def _logMetrics():
+    # höchstens alle HTTP_METRICS_LOG_SECONDS eine Zeile je Host ins Log
+    now = time.monotonic()
+    with _hosts_lock:
+        if now - _metrics_logged_at["at"] < settings.HTTP_METRICS_LOG_SECONDS:
+            return
+        _metrics_logged_at["at"] = now
+    for host, snapshot in hostMetrics().items():
+        logger.info(
+            "HTTP %s: %s Anfragen, %s Fehler, p50=%s ms p95=%s ms",
+            host, snapshot["requests"], snapshot["failures"], snapshot["p50_ms"], snapshot["p95_ms"],
+        )
+
+
+def _timeout():
+    return (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _getSession():
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=settings.HTTP_RETRIES,
+                backoff_factor=settings.HTTP_RETRY_BACKOFF,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=("GET", "HEAD"),
+                raise_on_status=False,
+                # ein "Retry-After: 3600" würde den Worker sonst eine Stunde blockieren
+                respect_retry_after_header=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=settings.HTTP_POOL_SIZE,
+                pool_maxsize=settings.HTTP_POOL_SIZE,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def request(method, url, **kwargs):
+    """
+    Anfrage über die gemeinsame Session (Keep-Alive, Verbindungs-Pool). Timeouts,
+    Wiederholungen mit Backoff bei 429/5xx und die Sperre pro Host gelten immer.
+    """
+    breaker, metrics = _hostState(url)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{urlsplit(url).hostname} ist vorübergehend gesperrt")
+
+    kwargs.setdefault("timeout", _timeout())
+    start = time.perf_counter()
+    success = False
+    try:
+        response = _getSession().request(method, url, **kwargs)
+        success = response.status_code < 500
+        return response
+    finally:
+        metrics.record(time.perf_counter() - start, success)
+        breaker.record(success)
+        _logMetrics()
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def head(url, **kwargs):
+    return request("HEAD", url, **kwargs)
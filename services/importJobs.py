@@ -0,0 +1,300 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from recipes.models import ImportJob
+from services.canonicalUrl import canonicalKey
+from services.extractionCache import extractionCacheStats
+from services.importRecipe import (
+    RecipeImportError,
+    cloneKnownRecipe,
+    createRecipe,
+    extractRecipeDicts,
+    fetchDescription,
+    findKnownRecipe,
+    importRecipe,
+    parseLocally,
+    prepareCaption,
+    stageTimer,
+)
+from services.thumbnailMirror import mirrorThumbnail
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+# Jobs, die gerade in diesem Prozess bearbeitet werden
+_running = set()
+_running_lock = threading.Lock()
+
+
+def _getExecutor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMPORT_WORKERS, thread_name_prefix="recipe-import"
+            )
+    return _executor
+
+
+def submitImport(job_id):
+    _getExecutor().submit(runImportJob, job_id)
+
+
+def enqueueImport(job):
+    """
+    Übergibt den Job nach dem Commit an den lokalen Worker-Pool.
+    """
+    transaction.on_commit(lambda: submitImport(job.id))
+
+
+def enqueueImportBatch(jobs):
+    """
+    Übergibt alle Jobs eines Sammel-Imports nach dem Commit als eine Aufgabe an
+    den Worker-Pool.
+    """
+    job_ids = [job.id for job in jobs]
+    transaction.on_commit(lambda: _getExecutor().submit(runImportBatch, job_ids))
+
+
+def _claim(job_id):
+    # nur wer den Job von "queued" auf "running" setzt, bearbeitet ihn
+    claimed = ImportJob.objects.filter(id=job_id, status=ImportJob.Status.QUEUED).update(
+        status=ImportJob.Status.RUNNING, attempts=F("attempts") + 1, updated_at=timezone.now()
+    )
+    if claimed:
+        with _running_lock:
+            _running.add(job_id)
+    return claimed
+
+
+def _release(*job_ids):
+    with _running_lock:
+        _running.difference_update(job_ids)
+
+
+def _heartbeat(job_ids):
+    # zeigt, dass die Jobs noch bearbeitet werden (resumeStaleJobs lässt sie in Ruhe)
+    ImportJob.objects.filter(id__in=job_ids, status=ImportJob.Status.RUNNING).update(
+        updated_at=timezone.now()
+    )
+
+
+def _finish(job, recipe=None, error=None, stats=None):
+    """
+    Schließt einen Job ab und speichert die Kennzahlen des Imports. Bei
+    vorübergehenden Fehlern wird er mit wachsendem Abstand erneut eingeplant,
+    bis IMPORT_MAX_ATTEMPTS erreicht ist.
+    """
+    stats = stats or {}
+    job.fetch_ms = stats.get("fetch")
+    job.extract_ms = stats.get("extract")
+    job.persist_ms = stats.get("persist")
+    job.tokens_before = stats.get("tokens_before")
+    job.tokens_after = stats.get("tokens_after")
+    job.parser_confidence = stats.get("parser_confidence")
+    cache = extractionCacheStats()
+    logger.info(
+        "Import %s: fetch=%s ms extract=%s ms persist=%s ms tokens=%s->%s parser=%s "
+        "cache=%s/%s (%.0f%%)",
+        job.id, job.fetch_ms, job.extract_ms, job.persist_ms,
+        job.tokens_before, job.tokens_after, job.parser_confidence,
+        cache["hits"], cache["hits"] + cache["misses"], cache["hit_rate"] * 100,
+    )
+
+    job.recipe = recipe
+    if error is None:
+        job.status = ImportJob.Status.DONE
+        job.error = ""
+    elif isinstance(error, RecipeImportError):
+        job.status = ImportJob.Status.FAILED
+        job.error = str(error)
+    else:
+        logger.error(
+            "Import %s fehlgeschlagen (Versuch %s)", job.id, job.attempts, exc_info=error
+        )
+        job.error = str(error)
+        if job.attempts < settings.IMPORT_MAX_ATTEMPTS:
+            job.status = ImportJob.Status.QUEUED
+            delay = settings.IMPORT_RETRY_DELAY * 2 ** (job.attempts - 1)
+            threading.Timer(delay, submitImport, args=(job.id,)).start()
+        else:
+            job.status = ImportJob.Status.FAILED
+    job.save(
+        update_fields=[
+            "recipe", "status", "error", "fetch_ms", "extract_ms", "persist_ms",
+            "tokens_before", "tokens_after", "parser_confidence", "updated_at",
+        ]
+    )
+
+
+def runImportJob(job_id):
+    close_old_connections()
+    try:
+        if not _claim(job_id):
+            return
+
+        try:
+            job = ImportJob.objects.select_related("user").get(id=job_id)
+            stats = {}
+            try:
+                _finish(job, recipe=importRecipe(job.user, job.url, stats), stats=stats)
+            except Exception as e:
+                _finish(job, error=e, stats=stats)
+        finally:
+            _release(job_id)
+    finally:
+        close_old_connections()
+
+
+def runImportBatch(job_ids):
+    """
+    Bearbeitet einen Sammel-Import: alle Beschreibungen werden parallel geholt
+    und gemeinsam extrahiert, danach wird jeder Job einzeln abgeschlossen.
+    Nach jedem Schritt wird updated_at der Jobs erneuert, damit ein langer
+    Sammel-Import nicht als liegen geblieben gilt. Scheitert ein Job in einem
+    Schritt, läuft der Rest weiter; Wiederholungen nach Fehlern laufen wie bei
+    Einzel-Importen über runImportJob.
+    """
+    close_old_connections()
+    try:
+        claimed = [job_id for job_id in job_ids if _claim(job_id)]
+        try:
+            _runClaimedBatch(claimed)
+        except Exception as e:
+            # nichts bleibt "running" liegen: offene Jobs gehen in den Retry
+            for job in ImportJob.objects.filter(id__in=claimed, status=ImportJob.Status.RUNNING):
+                _finish(job, error=e)
+        finally:
+            _release(*claimed)
+    finally:
+        close_old_connections()
+
+
+def _runClaimedBatch(claimed):
+    jobs = list(ImportJob.objects.select_related("user").filter(id__in=claimed).order_by("id"))
+    if not jobs:
+        return
+
+    stats = {job.id: {} for job in jobs}
+
+    def fetch(job):
+        with stageTimer(stats[job.id], "fetch"):
+            description, thumbnail = fetchDescription(job.url)
+            return description, thumbnail, mirrorThumbnail(thumbnail)
+
+    captions, errors = {}, {}
+    with ThreadPoolExecutor(
+        max_workers=min(settings.IMPORT_FETCH_WORKERS, len(jobs)),
+        thread_name_prefix="recipe-fetch",
+    ) as pool:
+        # Kurzlinks auflösen; schon bekannte Videos werden nur kopiert
+        key_futures = {job.id: pool.submit(canonicalKey, job.url) for job in jobs}
+        source_keys, remaining = {}, []
+        for job in jobs:
+            # ein kaputter Link geht in den Retry, der Rest des Imports läuft weiter
+            try:
+                source_keys[job.id] = key_futures[job.id].result()
+                known = findKnownRecipe(job.user, source_keys[job.id])
+                if known is None:
+                    remaining.append(job)
+                    continue
+                recipe = cloneKnownRecipe(job.user, job.url, known, stats[job.id])
+                _finish(job, recipe=recipe, stats=stats[job.id])
+            except Exception as e:
+                _finish(job, error=e, stats=stats[job.id])
+        jobs = remaining
+        _heartbeat([job.id for job in jobs])
+        futures = {pool.submit(fetch, job): job.id for job in jobs}
+        for future in as_completed(futures):
+            job_id = futures[future]
+            try:
+                captions[job_id] = future.result()
+            except Exception as e:
+                errors[job_id] = e
+            # auch die noch wartenden Abrufe gehören zu einem lebenden Import
+            _heartbeat([job.id for job in jobs])
+
+    recipe_dicts, pending = {}, {}
+    for job_id, (description, *_) in captions.items():
+        try:
+            with stageTimer(stats[job_id], "extract"):
+                caption = prepareCaption(description, stats[job_id])
+                recipe_dicts[job_id] = parseLocally(caption, stats[job_id])
+        except Exception as e:
+            errors[job_id] = e
+            continue
+        if recipe_dicts[job_id] is None:
+            pending[job_id] = caption
+
+    # ein gemeinsamer Aufruf: jeder Job hat so lange auf sein Ergebnis gewartet
+    extract_stats = {}
+    with stageTimer(extract_stats, "extract"):
+        try:
+            recipe_dicts.update(extractRecipeDicts(pending))
+        except Exception as e:
+            recipe_dicts.update((job_id, e) for job_id in pending)
+    for job_id in pending:
+        stats[job_id]["extract"] += extract_stats["extract"]
+    _heartbeat([job.id for job in jobs])
+
+    for job in jobs:
+        error = errors.get(job.id)
+        if error is None and isinstance(recipe_dicts[job.id], Exception):
+            error = recipe_dicts[job.id]
+        if error is not None:
+            _finish(job, error=error, stats=stats[job.id])
+            continue
+        try:
+            with stageTimer(stats[job.id], "persist"):
+                _, thumbnail, thumbnail_variants = captions[job.id]
+                recipe = createRecipe(
+                    job.user, recipe_dicts[job.id], job.url, thumbnail,
+                    source_keys[job.id], thumbnail_variants,
+                )
+            _finish(job, recipe=recipe, stats=stats[job.id])
+        except Exception as e:
+            _finish(job, error=e, stats=stats[job.id])
+
+
+def resumeStaleJobs(jobs=None, include_running=False):
+    """
+    Setzt Jobs, die zu lange "queued" sind (IMPORT_STALE_SECONDS), wieder in die
+    Warteschlange und gibt sie zurück. Laufende Jobs sind davon ausgenommen, weil
+    ein langsamer Import sonst ein zweites Mal startet; sie werden nur mit
+    `include_running` nach einem Neustart übernommen (process_import_jobs), und
+    auch dann nur, wenn sie seit IMPORT_RUNNING_STALE_SECONDS kein Lebenszeichen
+    gegeben haben und nicht in diesem Prozess laufen.
+    """
+    if jobs is None:
+        jobs = ImportJob.objects.all()
+    now = timezone.now()
+    stale_filter = Q(
+        status=ImportJob.Status.QUEUED,
+        updated_at__lt=now - timedelta(seconds=settings.IMPORT_STALE_SECONDS),
+    )
+    if include_running:
+        stale_filter |= Q(
+            status=ImportJob.Status.RUNNING,
+            updated_at__lt=now - timedelta(seconds=settings.IMPORT_RUNNING_STALE_SECONDS),
+        )
+    with _running_lock:
+        running = set(_running)
+    stale = [
+        job_id
+        for job_id in jobs.filter(stale_filter).values_list("id", flat=True)
+        if job_id not in running
+    ]
+    if stale:
+        # nur Jobs, die sich seit der Abfrage nicht geändert haben
+        ImportJob.objects.filter(id__in=stale).filter(stale_filter).update(
+            status=ImportJob.Status.QUEUED, updated_at=now
+        )
+    return stale
@@ -0,0 +1,188 @@
+import json
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from recipes.models import Recipe
+
+from services.RecipeExtractor import getRecipeExtractor
+from services.captionCleaner import cleanCaption, estimateTokens
+from services.captionParser import parseCaption
+from services.extractionCache import extractionCacheKey, getCachedExtraction, storeExtraction
+from services.getTikTokDesc import getTikTokDesc
+from services.getInstaDesc import getInstaDesc
+from services.canonicalUrl import canonicalKey
+from services.materializeRecipe import materializeRecipe, copyRecipe
+from services.thumbnailMirror import mirrorThumbnail
+
+
+class RecipeImportError(Exception):
+    """
+    Fehler, bei dem sich ein erneuter Versuch nicht lohnt (z.B. kein Rezept im Text).
+    Die Meldung wird dem Benutzer angezeigt.
+    """
+
+
+@contextmanager
+def stageTimer(stats, stage):
+    """
+    Misst die Dauer eines Import-Schritts ("fetch", "extract", "persist") in
+    Millisekunden, auch wenn er fehlschlägt.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats[stage] = round((time.perf_counter() - start) * 1000)
+
+
+def prepareCaption(description, stats):
+    """
+    Bereinigt die Beschreibung vor der Extraktion und merkt sich die geschätzte
+    Token-Zahl vorher und nachher.
+    """
+    cleaned = cleanCaption(description, settings.CAPTION_TOKEN_BUDGET)
+    stats["tokens_before"] = estimateTokens(description)
+    stats["tokens_after"] = estimateTokens(cleaned)
+    return cleaned
+
+
+def parseLocally(caption, stats):
+    """
+    Versucht es zuerst mit dem regelbasierten Parser. Gibt das Rezept nur zurück,
+    wenn er sich sicher genug ist, sonst None (dann entscheidet das Sprachmodell).
+    """
+    recipe_dict, confidence = parseCaption(caption)
+    stats["parser_confidence"] = confidence
+    if confidence >= settings.CAPTION_PARSER_MIN_CONFIDENCE and recipe_dict["title"]:
+        return recipe_dict
+    return None
+
+
+def getExtractor():
+    options = {}
+    if settings.RECIPE_EXTRACTOR_BACKEND == "fake":
+        options["latency"] = settings.RECIPE_EXTRACTOR_FAKE_LATENCY
+    return getRecipeExtractor(
+        api_key=settings.LANGEXTRACT_API_KEY, backend=settings.RECIPE_EXTRACTOR_BACKEND, **options
+    )
+
+
+def isSupportedLink(link):
+    return "instagram.com" in link or "tiktok.com" in link
+
+
+def fetchDescription(link):
+    if "instagram.com" in link:
+        description, thumbnail = getInstaDesc(link) or (None, None)
+    elif "tiktok.com" in link:
+        description, thumbnail = getTikTokDesc(link)
+    else:
+        raise RecipeImportError("Es werden nur TikTok und Instagram-URLs unterstützt.")
+
+    if not description or not thumbnail:
+        raise RecipeImportError("Fehler beim Extrahieren der Video Beschreibung")
+    return description, thumbnail
+
+
+def _recipeFromDocument(annotated_doc):
+    if annotated_doc and annotated_doc.extractions:
+        for ex in annotated_doc.extractions:
+            if ex.extraction_class == "Recipe":
+                return json.loads(ex.extraction_text)
+    raise RecipeImportError("Fehler beim Extrahieren des Rezepts aus der Beschreibung.")
+
+
+def extractRecipeDicts(descriptions):
+    """
+    Extrahiert die Rezepte zu mehreren Beschreibungen ({Schlüssel: Text}).
+    Bereits bekannte Texte kommen aus dem Extraktions-Cache, alle übrigen gehen
+    gemeinsam in einen langextract-Aufruf. Gibt {Schlüssel: Rezept-Dict oder
+    Exception} zurück, damit ein einzelner Fehlschlag nicht den Rest mitreißt.
+    """
+    extractor = getExtractor()
+    extractor.reloadIfChanged()
+    # Ergebnisse des Fake-Backends dürfen nie als echte Extraktionen getroffen werden
+    model = f"{extractor.backend.name}:{extractor.model}"
+
+    results, cache_keys, pending = {}, {}, {}
+    for key, description in descriptions.items():
+        cache_keys[key] = extractionCacheKey(description, model, extractor.prompt_version)
+        recipe_dict = getCachedExtraction(cache_keys[key])
+        if recipe_dict is not None:
+            results[key] = recipe_dict
+        else:
+            pending[key] = description
+
+    if pending:
+        try:
+            documents = extractor.extract_recipes(pending, max_workers=settings.IMPORT_EXTRACT_WORKERS)
+        except Exception as e:
+            return {**results, **{key: e for key in pending}}
+
+        for key in pending:
+            try:
+                results[key] = _recipeFromDocument(documents.get(key))
+                storeExtraction(cache_keys[key], results[key])
+            except Exception as e:
+                results[key] = e
+    return results
+
+
+def extractRecipeDict(description):
+    recipe_dict = extractRecipeDicts({0: description})[0]
+    if isinstance(recipe_dict, Exception):
+        raise recipe_dict
+    return recipe_dict
+
+
+def createRecipe(user, recipe_dict, link, thumbnail, source_key=None, thumbnail_variants=None):
+    return materializeRecipe(
+        user,
+        recipe_dict,
+        thumbnail=thumbnail,
+        url=link,
+        source_key=source_key,
+        thumbnail_variants=thumbnail_variants,
+    )
+
+
+def findKnownRecipe(user, source_key):
+    """
+    Sucht ein bereits importiertes Rezept zum selben Video. In Frage kommen nur
+    Rezepte, die `user` ohnehin sehen darf (eigene, von Freunden, öffentliche
+    Profile), weil auch nachträgliche Änderungen mitkopiert werden.
+    """
+    if not source_key:
+        return None
+    return Recipe.objects.visible_to(user).filter(source_key=source_key).order_by("id").first()
+
+
+def cloneKnownRecipe(user, link, known, stats):
+    with stageTimer(stats, "persist"):
+        return copyRecipe(known, user, original_creator=user, url=link)
+
+
+def importRecipe(user, link, stats=None):
+    """
+    Holt die Beschreibung eines TikTok-/Instagram-Videos, extrahiert daraus das
+    Rezept und legt es für `user` an. Dauer der Schritte und Token-Schätzungen
+    landen in `stats`.
+    """
+    if stats is None:
+        stats = {}
+    # dasselbe Video wurde schon einmal importiert: ohne Download und LLM kopieren
+    source_key = canonicalKey(link)
+    known = findKnownRecipe(user, source_key)
+    if known is not None:
+        return cloneKnownRecipe(user, link, known, stats)
+
+    with stageTimer(stats, "fetch"):
+        description, thumbnail = fetchDescription(link)
+        thumbnail_variants = mirrorThumbnail(thumbnail)
+    with stageTimer(stats, "extract"):
+        caption = prepareCaption(description, stats)
+        recipe_dict = parseLocally(caption, stats) or extractRecipeDict(caption)
+    with stageTimer(stats, "persist"):
+        return createRecipe(user, recipe_dict, link, thumbnail, source_key, thumbnail_variants)
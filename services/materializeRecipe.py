@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.models import Recipe, Ingredient, Instruction
+from services.searchCache import bumpLibraryVersion
+from services.searchRecipes import indexNewRecipe
+from services.thumbnailExpiry import thumbnailExpiry
+
+RECIPE_FIELDS = ("title", "description", "prep_time", "cook_time", "servings")
+
+
+def materializeRecipe(
+    user,
+    recipe_dict,
+    original_creator=None,
+    thumbnail=None,
+    url=None,
+    source_key=None,
+    thumbnail_fetched_at=None,
+    thumbnail_variants=None,
+):
+    """
+    Legt ein Rezept aus einem Rezept-Dict (Form wie bei der Extraktion) samt
+    Zutaten und Schritten in einer Transaktion an: ein INSERT je Tabelle, egal
+    wie viele Zutaten es hat, und bei einem Fehler bleibt nichts halb stehen.
+
+    bulk_create löst keine Signale aus, deshalb werden Suchindex und
+    Bibliotheksversion hier einmal am Ende gesetzt statt pro Zeile.
+    """
+    recipe = Recipe(
+        user=user,
+        original_creator=original_creator or user,
+        thumbnail=thumbnail,
+        thumbnail_fetched_at=thumbnail_fetched_at or (timezone.now() if thumbnail else None),
+        thumbnail_expires_at=thumbnailExpiry(thumbnail),
+        thumbnail_variants=thumbnail_variants,
+        url=url,
+        source_key=source_key,
+        **{field: recipe_dict.get(field, "") for field in RECIPE_FIELDS},
+    )
+    ingredients = [
+        Ingredient(recipe=recipe, name=ing["name"], quantity=ing.get("quantity"), unit=ing.get("unit"))
+        for ing in recipe_dict.get("ingredients", [])
+    ]
+    instructions = [
+        Instruction(recipe=recipe, step_number=i + 1, description=desc.strip())
+        for i, desc in enumerate(recipe_dict.get("instructions", []))
+    ]
+
+    with transaction.atomic():
+        recipe._materializing = True
+        try:
+            recipe.save()
+        finally:
+            del recipe._materializing
+        Ingredient.objects.bulk_create(ingredients)
+        Instruction.objects.bulk_create(instructions)
+        indexNewRecipe(recipe, [ing.name for ing in ingredients])
+        bumpLibraryVersion(user.id)
+    return recipe
+
+
+def copyRecipe(recipe, user, original_creator=None, url=None):
+    """
+    Kopiert ein Rezept mit allen Zutaten und Schritten zu `user`. Ohne Angabe
+    bleibt der Besitzer des Originals als original_creator eingetragen.
+    """
+    recipe_dict = {field: getattr(recipe, field) for field in RECIPE_FIELDS}
+    recipe_dict["ingredients"] = list(recipe.ingredients.values("name", "quantity", "unit"))
+    recipe_dict["instructions"] = list(
+        recipe.instruction_steps.order_by("step_number").values_list("description", flat=True)
+    )
+    return materializeRecipe(
+        user,
+        recipe_dict,
+        original_creator=original_creator or recipe.user,
+        thumbnail=recipe.thumbnail,
+        thumbnail_fetched_at=recipe.thumbnail_fetched_at,
+        thumbnail_variants=recipe.thumbnail_variants,
+        url=url or recipe.url,
+        source_key=recipe.source_key,
+    )
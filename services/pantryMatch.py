@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from rapidfuzz import process, fuzz
+
+from django.conf import settings
+
+from recipes.models import RecipeSearchIndex, UserProfile
+from services.searchRecipes import normalize
+
+# Teilstring-Treffer erst ab dieser Länge, sonst passt "ei" zu "weizenmehl"
+MIN_PARTIAL_LENGTH = 4
+
+
+class PantryIndex:
+    """
+    Zutaten-Vokabular und je Rezept ein Bitset (np.packbits) der enthaltenen
+    Vokabel-Einträge. Eine Vorratsabfrage ist damit ein AND plus Popcount über
+    alle Rezepte auf einmal.
+    """
+
+    def __init__(self, index_entries):
+        recipe_ids = []
+        recipe_ingredients = []
+        for recipe_id, ingredients in index_entries:
+            names = {name for name in ingredients.split("\n") if name} if ingredients else set()
+            if names:
+                recipe_ids.append(recipe_id)
+                recipe_ingredients.append(names)
+
+        self.vocabulary = sorted(set().union(*recipe_ingredients))
+        columns = {name: i for i, name in enumerate(self.vocabulary)}
+
+        matrix = np.zeros((len(recipe_ids), len(self.vocabulary)), dtype=bool)
+        for row, names in enumerate(recipe_ingredients):
+            matrix[row, [columns[name] for name in names]] = True
+
+        self.recipe_ids = np.array(recipe_ids, dtype=np.int64)
+        self.totals = matrix.sum(axis=1)
+        self.bitsets = np.packbits(matrix, axis=1)
+
+    def available(self, pantry_items):
+        """
+        Bitset der Vokabel-Einträge, die durch die Vorratsliste abgedeckt sind.
+        """
+        items = [normalize(item) for item in pantry_items if normalize(item)]
+        have = np.zeros(len(self.vocabulary), dtype=bool)
+        if items and self.vocabulary:
+            ratio = process.cdist(items, self.vocabulary, scorer=fuzz.ratio, workers=-1)
+            partial = process.cdist(items, self.vocabulary, scorer=fuzz.partial_ratio, workers=-1)
+            partial[np.array([len(item) < MIN_PARTIAL_LENGTH for item in items])] = 0
+            scores = np.maximum(ratio, partial)
+            have = (scores >= settings.PANTRY_MATCH_THRESHOLD).any(axis=0)
+        return have
+
+    def rank(self, pantry_items, limit):
+        """
+        Gibt [(recipe_id, matched, total, missing_names)] nach Abdeckung sortiert
+        zurück; bei gleicher Abdeckung zuerst die Rezepte mit weniger fehlenden Zutaten.
+        """
+        if not len(self.recipe_ids):
+            return []
+
+        have = self.available(pantry_items)
+        have_bits = np.packbits(have)
+        matched = np.bitwise_count(self.bitsets & have_bits).sum(axis=1)
+        coverage = matched / self.totals
+
+        candidates = np.flatnonzero(matched)
+        order = np.lexsort((self.totals[candidates] - matched[candidates], -coverage[candidates]))
+        results = []
+        for row in candidates[order[:limit]]:
+            row_mask = np.unpackbits(self.bitsets[row], count=len(self.vocabulary)).astype(bool)
+            missing = [self.vocabulary[i] for i in np.flatnonzero(row_mask & ~have)]
+            results.append(
+                (int(self.recipe_ids[row]), int(matched[row]), int(self.totals[row]), missing)
+            )
+        return results
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def _getIndex(user_ids):
+    # ändert sich eine der beteiligten Bibliotheken, ändert sich auch der Schlüssel
+    key = tuple(
+        UserProfile.objects.filter(user_id__in=user_ids)
+        .order_by("user_id")
+        .values_list("user_id", "library_version")
+    )
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    index = PantryIndex(
+        RecipeSearchIndex.objects.filter(user_id__in=user_ids)
+        .order_by("recipe_id")
+        .values_list("recipe_id", "ingredients")
+    )
+    with _lock:
+        _indexes[key] = index
+        while len(_indexes) > settings.PANTRY_MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def matchPantry(user, pantry_items, limit=None):
+    """
+    Rangliste der eigenen Rezepte und der Rezepte von Freunden nach Abdeckung
+    durch die Vorratsliste.
+    """
+    user_ids = [user.id]
+    friend_profile = getattr(user, "friend_profile", None)
+    if friend_profile is not None:
+        user_ids += list(friend_profile.friends.values_list("id", flat=True))
+
+    return _getIndex(user_ids).rank(pantry_items, limit or settings.PANTRY_RESULT_LIMIT)
@@ -0,0 +1,107 @@
+import random
+
+DISHES = {
+    "de": [
+        "Spaghetti", "Pfannkuchen", "Kartoffelsuppe", "Linsencurry", "Gemüseauflauf",
+        "Risotto", "Flammkuchen", "Käsespätzle", "Gulasch", "Bratkartoffeln",
+        "Nudelsalat", "Ofengemüse", "Frikadellen", "Kaiserschmarrn", "Shakshuka",
+        "Buddha Bowl", "Lasagne", "Gnocchi", "Rührei", "Bananenbrot",
+    ],
+    "en": [
+        "Pasta", "Pancakes", "Tomato Soup", "Chicken Curry", "Mac and Cheese",
+        "Fried Rice", "Burrito Bowl", "Banana Bread", "Chili con Carne", "Omelette",
+        "Caesar Salad", "Stir Fry", "Meatballs", "Porridge", "Tacos",
+        "Smash Burger", "Noodle Soup", "Granola", "Lasagna", "Fish Cakes",
+    ],
+}
+
+STYLES = {
+    "de": [
+        "mit Hähnchen", "vegan", "mit Spinat", "wie bei Oma", "aus dem Ofen",
+        "mit Feta", "in 15 Minuten", "scharf", "mit Pilzen", "mit Tomatensoße",
+    ],
+    "en": [
+        "with chicken", "vegan", "with spinach", "one pot", "high protein",
+        "with feta", "in 15 minutes", "spicy", "with mushrooms", "easy",
+    ],
+}
+
+INGREDIENTS = {
+    "de": [
+        ("Mehl", "g"), ("Eier", None), ("Milch", "ml"), ("Salz", "Prise"), ("Zucker", "g"),
+        ("Butter", "g"), ("Zwiebel", None), ("Knoblauch", "Zehe"), ("Tomaten", "g"),
+        ("Passierte Tomaten", "ml"), ("Hähnchenbrust", "g"), ("Hackfleisch", "g"),
+        ("Kartoffeln", "g"), ("Reis", "g"), ("Nudeln", "g"), ("Spinat", "g"), ("Feta", "g"),
+        ("Parmesan", "g"), ("Sahne", "ml"), ("Olivenöl", "EL"), ("Paprika", None),
+        ("Champignons", "g"), ("Linsen", "g"), ("Kokosmilch", "ml"), ("Currypaste", "EL"),
+        ("Zitrone", None), ("Petersilie", "Bund"), ("Pfeffer", "Prise"), ("Haferflocken", "g"),
+        ("Bananen", None), ("Backpulver", "TL"), ("Gemüsebrühe", "ml"), ("Speck", "g"),
+    ],
+    "en": [
+        ("Flour", "g"), ("Eggs", None), ("Milk", "ml"), ("Salt", "pinch"), ("Sugar", "g"),
+        ("Butter", "g"), ("Onion", None), ("Garlic", "clove"), ("Tomatoes", "g"),
+        ("Chicken breast", "g"), ("Ground beef", "g"), ("Potatoes", "g"), ("Rice", "g"),
+        ("Pasta", "g"), ("Spinach", "g"), ("Cheddar", "g"), ("Cream", "ml"), ("Olive oil", "tbsp"),
+        ("Bell pepper", None), ("Mushrooms", "g"), ("Coconut milk", "ml"), ("Soy sauce", "tbsp"),
+        ("Lemon", None), ("Parsley", "bunch"), ("Pepper", "pinch"), ("Oats", "g"),
+        ("Bananas", None), ("Baking powder", "tsp"), ("Stock", "ml"), ("Bacon", "g"),
+    ],
+}
+
+STEPS = {
+    "de": [
+        "{a} klein schneiden.", "{a} in einer Pfanne mit Öl anbraten.",
+        "{a} und {b} verrühren.", "Mit {a} abschmecken.", "{a} unterheben und 10 Minuten köcheln lassen.",
+        "Im Ofen bei 200 Grad 20 Minuten backen.", "{a} kochen und abgießen.", "Mit {a} servieren.",
+    ],
+    "en": [
+        "Chop the {a}.", "Fry the {a} in a pan with oil.", "Whisk the {a} and {b}.",
+        "Season with {a}.", "Stir in the {a} and simmer for 10 minutes.",
+        "Bake at 200 degrees for 20 minutes.", "Boil the {a} and drain.", "Serve with {a}.",
+    ],
+}
+
+# Feste Anfragen für Benchmarks: exakte Treffer, Tippfehler, mehrere Begriffe, breite Begriffe
+QUERIES = [
+    "salz", "spaghetti", "spagetti", "hähnchen curry", "tomate knoblauch",
+    "pancakes", "chiken", "mehl eier milch", "feta spinat", "xylophon",
+]
+
+
+def generateRecipe(rng, language):
+    dish = rng.choice(DISHES[language])
+    title = f"{dish} {rng.choice(STYLES[language])}" if rng.random() < 0.7 else dish
+    ingredients = [
+        {
+            "name": name,
+            "quantity": rng.choice([None, 1, 2, 3, 50, 100, 200, 250, 400, 500]) if unit or rng.random() < 0.5 else None,
+            "unit": unit,
+        }
+        for name, unit in rng.sample(INGREDIENTS[language], rng.randint(3, 14))
+    ]
+    names = [ing["name"] for ing in ingredients]
+    instructions = [
+        rng.choice(STEPS[language]).format(a=rng.choice(names), b=rng.choice(names))
+        for _ in range(rng.randint(2, 8))
+    ]
+    return {
+        "title": title,
+        "description": " ".join(instructions[:2]),
+        "prep_time": f"{rng.choice([5, 10, 15, 20, 30])} Min",
+        "cook_time": f"{rng.choice([10, 20, 30, 45, 60])} Min",
+        "servings": str(rng.randint(1, 6)),
+        "ingredients": ingredients,
+        "instructions": instructions,
+    }
+
+
+def generateCorpus(size, seed=0, german_share=0.7):
+    """
+    Erzeugt `size` zufällige, aber reproduzierbare Rezepte im Format, das
+    recipe_input aus der Extraktion erhält (title, ingredients, instructions, ...).
+    """
+    rng = random.Random(seed)
+    return [
+        generateRecipe(rng, "de" if rng.random() < german_share else "en")
+        for _ in range(size)
+    ]
@@ -0,0 +1,123 @@
+import functools
+
+from django.conf import settings
+from django.db import connection, connections
+
+from recipes.models import RecipeSearchIndex
+from services.searchRecipes import normalize
+
+FTS_TABLE = "recipes_recipesearchindex_fts"
+# Trigramme eines Begriffs dienen als Kandidatenfilter. Erst ab sechs Zeichen
+# behält ein Begriff mit einem Tippfehler sicher mindestens ein intaktes
+# Trigramm; kürzere Begriffe ("nuxel" statt "nudel") teilen womöglich keins.
+MIN_TERM_LENGTH = 6
+NGRAM = 3
+
+
+def trigrams(term):
+    return list(dict.fromkeys(term[i:i + NGRAM] for i in range(len(term) - NGRAM + 1)))
+
+
+class ScanBackend:
+    """
+    Liefert alle Suchindex-Einträge eines Benutzers; rapidfuzz bewertet jeden davon.
+    """
+
+    name = "scan"
+
+    def candidates(self, user, query):
+        return RecipeSearchIndex.objects.filter(user=user)
+
+
+class FullTextBackend(ScanBackend):
+    """
+    Erzeugt über den Volltextindex der Datenbank eine begrenzte Kandidatenmenge,
+    die anschließend nur noch von rapidfuzz nachsortiert wird. Gesucht wird nach
+    einzelnen Trigrammen der Begriffe, nicht nach ganzen Wörtern, damit auch
+    Rezepte mit Tippfehlern ("spagetti") Kandidaten werden, wenn es zugleich
+    exakte Treffer gibt. Gesucht und gerankt wird nur in Titel und Zutaten,
+    den Spalten, die scoreEntries bewertet.
+
+    Jeder Begriff muss im Scoring treffen, daher reicht ein Begriff, der lang
+    genug ist; hat die Suche keinen, wird wie bisher alles gescannt.
+    """
+
+    def candidates(self, user, query):
+        terms = [term for term in normalize(query).split() if len(term) >= MIN_TERM_LENGTH]
+        if not terms:
+            return super().candidates(user, query)
+
+        grams = list(dict.fromkeys(gram for term in terms for gram in trigrams(term)))
+        limit = settings.SEARCH_CANDIDATE_LIMIT
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql, self.params(self.match_expression(grams), user.id, limit))
+            ids = [row[0] for row in cursor.fetchall()]
+
+        if not ids:
+            return super().candidates(user, query)
+        return RecipeSearchIndex.objects.filter(id__in=ids)
+
+    def match_expression(self, grams):
+        # ohne Operatoren verknüpft der BOOLEAN MODE die Phrasen mit ODER
+        return " ".join('"%s"' % gram.replace('"', '""') for gram in grams)
+
+    def params(self, match, user_id, limit):
+        return [match, user_id, limit]
+
+
+class SQLiteFTSBackend(FullTextBackend):
+    name = "sqlite_fts5"
+    sql = f"""
+        SELECT {FTS_TABLE}.rowid
+        FROM {FTS_TABLE}
+        JOIN recipes_recipesearchindex ON recipes_recipesearchindex.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND recipes_recipesearchindex.user_id = %s
+        ORDER BY bm25({FTS_TABLE})
+        LIMIT %s
+    """
+
+    def match_expression(self, grams):
+        return " OR ".join('"%s"' % gram.replace('"', '""') for gram in grams)
+
+
+class MySQLFullTextBackend(FullTextBackend):
+    name = "mysql_fulltext"
+    # Volltextindex über (title, ingredients), siehe Migration 0023
+    sql = """
+        SELECT id
+        FROM recipes_recipesearchindex
+        WHERE MATCH(title, ingredients) AGAINST (%s IN BOOLEAN MODE)
+          AND user_id = %s
+        ORDER BY MATCH(title, ingredients) AGAINST (%s IN BOOLEAN MODE) DESC
+        LIMIT %s
+    """
+
+    def params(self, match, user_id, limit):
+        return [match, user_id, match, limit]
+
+
+@functools.cache
+def _hasFTSTable(alias):
+    return FTS_TABLE in connections[alias].introspection.table_names()
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (ScanBackend, SQLiteFTSBackend, MySQLFullTextBackend)
+}
+
+
+def getSearchBackend():
+    """
+    Wählt das Such-Backend: settings.SEARCH_BACKEND erzwingt eines, sonst wird
+    anhand der Datenbank-Engine entschieden.
+    """
+    name = settings.SEARCH_BACKEND
+    if name:
+        return BACKENDS[name]()
+
+    if connection.vendor == "sqlite" and _hasFTSTable(connection.alias):
+        return SQLiteFTSBackend()
+    if connection.vendor == "mysql":
+        return MySQLFullTextBackend()
+    return ScanBackend()
@@ -0,0 +1,39 @@
+import hashlib
+
+from django.core.cache import caches
+from django.db.models import F
+
+from recipes.models import UserProfile
+from services.searchRecipes import normalize
+
+
+def libraryVersion(user_id):
+    """
+    Aktuelle Versionsnummer der Rezeptbibliothek eines Benutzers, oder None wenn
+    er kein UserProfile hat (dann wird nicht gecacht).
+    """
+    return (
+        UserProfile.objects.filter(user_id=user_id)
+        .values_list("library_version", flat=True)
+        .first()
+    )
+
+
+def bumpLibraryVersion(user_id):
+    UserProfile.objects.filter(user_id=user_id).update(
+        library_version=F("library_version") + 1
+    )
+
+
+def searchCacheKey(user_id, version, query, *parts):
+    digest = hashlib.sha1(normalize(query).encode("utf-8")).hexdigest()
+    return ":".join(map(str, ("search", user_id, version, digest, *parts)))
+
+
+def getCachedSearch(key):
+    return caches["search"].get(key)
+
+
+def cacheSearch(key, value):
+    # LocMemCache verdrängt bei MAX_ENTRIES die am längsten nicht gelesenen Einträge
+    caches["search"].set(key, value)
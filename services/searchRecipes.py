@@ -1,28 +1,179 @@
 #https://github.com/rapidfuzz/RapidFuzz
+import heapq
+
+import numpy as np
 from rapidfuzz import process, fuzz
 
-def searchRecipes(query, recipe_list):
-    terms = query.split()
-    results = []
-    for recipe in recipe_list:
-        ingredient_names = [ingredient.name for ingredient in recipe.ingredients.all()]
+from django.db import transaction
+
+from recipes.models import Recipe, RecipeSearchIndex
+
+
+MIN_SCORE = 70
+MAX_SCORE = 100
+CHUNK_SIZE = 1000
+
+
+def normalize(text):
+    return " ".join(str(text or "").lower().split())
+
+
+def _indexFields(recipe, ingredient_names):
+    return {
+        "user_id": recipe.user_id,
+        "title": normalize(recipe.title),
+        "ingredients": "\n".join(normalize(name) for name in ingredient_names),
+    }
+
+
+def indexRecipe(recipe):
+    """
+    Schreibt den Suchindex-Eintrag eines Rezepts (normalisierter Titel und
+    Zutaten) neu. Wird über die Signale in recipes/signals.py aufgerufen.
+    """
+    names = recipe.ingredients.values_list("name", flat=True)
+    RecipeSearchIndex.objects.update_or_create(
+        recipe=recipe, defaults=_indexFields(recipe, names)
+    )
+
+
+def indexNewRecipe(recipe, names):
+    """
+    Legt den Eintrag für ein gerade angelegtes Rezept an, ohne vorher zu lesen.
+    """
+    RecipeSearchIndex.objects.create(recipe=recipe, **_indexFields(recipe, names))
+
+
+def _recipesWithIngredients(user=None):
+    recipes = Recipe.objects.prefetch_related("ingredients").order_by("id")
+    if user is not None:
+        recipes = recipes.filter(user=user)
+    return recipes
+
+
+def rebuildSearchIndex(user=None):
+    """
+    Baut den Suchindex (optional nur für einen Benutzer) komplett neu auf.
+    """
+    entries = [
+        RecipeSearchIndex(
+            recipe=recipe,
+            **_indexFields(recipe, [ing.name for ing in recipe.ingredients.all()]),
+        )
+        for recipe in _recipesWithIngredients(user)
+    ]
+    with transaction.atomic():
+        stale = RecipeSearchIndex.objects.all()
+        if user is not None:
+            stale = stale.filter(user=user)
+        stale.delete()
+        RecipeSearchIndex.objects.bulk_create(entries, batch_size=500)
+    return len(entries)
+
+
+def checkSearchIndex(user=None):
+    """
+    Vergleicht den Suchindex mit den Rezepten in der Datenbank und gibt die
+    Rezept-IDs ohne Eintrag (missing), mit veraltetem Eintrag (stale) und
+    Einträge ohne passendes Rezept (orphaned) zurück.
+    """
+    index = RecipeSearchIndex.objects.all()
+    if user is not None:
+        index = index.filter(user=user)
+    indexed = {
+        recipe_id: {
+            "user_id": user_id,
+            "title": title,
+            "ingredients": ingredients,
+        }
+        for recipe_id, user_id, title, ingredients in index.values_list(
+            "recipe_id", "user_id", "title", "ingredients"
+        )
+    }
+
+    missing = []
+    stale = []
+    for recipe in _recipesWithIngredients(user):
+        expected = _indexFields(recipe, [ing.name for ing in recipe.ingredients.all()])
+        entry = indexed.pop(recipe.id, None)
+        if entry is None:
+            missing.append(recipe.id)
+        elif entry != expected:
+            stale.append(recipe.id)
+
+    return {"missing": missing, "stale": stale, "orphaned": sorted(indexed)}
+
+
+def scoreEntries(terms, index_entries, workers=-1):
+    """
+    Bewertet Suchindex-Einträge (recipe_id, title, ingredients) gegen normalisierte
+    Suchbegriffe und gibt (positions, scores) der Treffer in Eingabereihenfolge zurück.
+
+    Alle Begriffe werden in einem einzigen cdist-Aufruf gegen alle Titel und Zutaten
+    gescored; pro Rezept zählt je Begriff der beste Treffer, jeder Begriff muss >= 70 sein.
+    """
+    offsets = []
+    choices = []
+    for recipe_id, title, ingredients in index_entries:
+        offsets.append(len(choices))
+        choices.append(title)
+        if ingredients:
+            choices.extend(ingredients.split("\n"))
+
+    if not offsets:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+
+    matrix = process.cdist(
+        terms, choices, scorer=fuzz.partial_ratio, dtype=np.float64, workers=workers
+    )
+    # terms x recipes: bester Score je Begriff über Titel und Zutaten eines Rezepts
+    best = np.maximum.reduceat(matrix, offsets, axis=1)
+
+    positions = np.flatnonzero(best.min(axis=0) >= MIN_SCORE)
+    return positions, best[:, positions].sum(axis=0) / len(terms)
+
+
+def searchRecipes(query, index_entries, limit=None):
+    """
+    Gibt die besten `limit` Treffer (alle, wenn None) als [(recipe_id, score)]
+    absteigend nach Score zurück; gleiche Scores behalten die Eingabereihenfolge.
+
+    Die Einträge werden blockweise gescored. Sobald `limit` Treffer mit dem
+    Höchstscore gefunden sind, kann kein späterer Eintrag sie mehr verdrängen
+    und der Rest wird gar nicht mehr gelesen.
+    """
+    terms = [normalize(term) for term in query.split()]
+    if not terms:
+        return []
+
+    heap = []
+    start = 0
+    for chunk in _chunked(index_entries, CHUNK_SIZE):
+        positions, scores = scoreEntries(terms, chunk)
+        order = np.argsort(-scores, kind="stable")
+        if limit is not None:
+            order = order[:limit]
 
-        scores = []
+        for i in order:
+            item = (float(scores[i]), -(start + int(positions[i])), chunk[positions[i]][0])
+            if limit is None or len(heap) < limit:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
 
-        for term in terms:
-            title_score = fuzz.partial_ratio(term.lower(), recipe.title.lower())
-            ingredient_score = max(
-                [fuzz.partial_ratio(term.lower(), name.lower()) for name in ingredient_names] + [0]
-            )
-            scores.append(max(title_score, ingredient_score))
+        if limit is not None and len(heap) == limit and heap[0][0] >= MAX_SCORE:
+            break
+        start += len(chunk)
 
-        for score in scores:    
-            if all(score >= 70 for score in scores):
-                avg_score = sum(scores) / len(scores)
-                if recipe not in [r for r, s in results]:
-                    results.append((recipe, avg_score))
-                
+    return [(recipe_id, score) for score, _, recipe_id in sorted(heap, reverse=True)]
 
-    results = sorted(results, key=lambda x: x[1], reverse=True)
 
-    return results
\ No newline at end of file
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,91 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+
+from recipes.models import Recipe, Ingredient
+from services.searchRecipes import normalize
+from services.searchCache import libraryVersion
+
+
+class PrefixIndex:
+    """
+    Sortiertes Array aus (Schlüssel, Anzeige, Art). Jeder Titel und jede Zutat
+    wird unter jedem Wortanfang abgelegt, damit "bolo" auch "Spaghetti Bolognese"
+    findet. Eine Abfrage ist eine Binärsuche plus ein kurzer linearer Lauf.
+    """
+
+    def __init__(self, titles, ingredient_names):
+        entries = set()
+        for kind, texts in (("title", titles), ("ingredient", ingredient_names)):
+            for text in texts:
+                words = normalize(text).split()
+                for i in range(len(words)):
+                    entries.add((" ".join(words[i:]), text.strip(), kind))
+        self.entries = sorted(entries)
+        self.keys = [key for key, display, kind in self.entries]
+
+    def complete(self, prefix, limit):
+        suggestions = []
+        seen = set()
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            key, display, kind = self.entries[i]
+            if not key.startswith(prefix):
+                break
+            if display.lower() in seen:
+                continue
+            seen.add(display.lower())
+            suggestions.append((display, kind))
+            if len(suggestions) == limit:
+                break
+        return suggestions
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def _buildIndex(user_id):
+    titles = Recipe.objects.filter(user_id=user_id).values_list("title", flat=True)
+    names = (
+        Ingredient.objects.filter(recipe__user_id=user_id)
+        .exclude(name="")
+        .values_list("name", flat=True)
+        .distinct()
+    )
+    return PrefixIndex(titles, names)
+
+
+def _getIndex(user_id):
+    # die Bibliotheksversion macht veraltete Indizes auch in anderen Prozessen ungültig
+    version = libraryVersion(user_id)
+    with _lock:
+        cached = _indexes.get(user_id)
+        if cached is not None and cached[0] == version:
+            _indexes.move_to_end(user_id)
+            return cached[1]
+
+    index = _buildIndex(user_id)
+    with _lock:
+        _indexes[user_id] = (version, index)
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > settings.SEARCH_SUGGEST_MAX_USERS:
+            _indexes.popitem(last=False)
+    return index
+
+
+def suggestRecipes(user, query, limit=8):
+    """
+    Vervollständigt das zuletzt getippte Wort der Suchanfrage anhand der Titel
+    und Zutaten des Benutzers. Gibt [(vollständige Anfrage, Anzeige, Art)] zurück.
+    """
+    words = normalize(query).split()
+    if not words:
+        return []
+
+    head = " ".join(query.split()[:-1])
+    return [
+        ((f"{head} {display}" if head else display), display, kind)
+        for display, kind in _getIndex(user.id).complete(words[-1], limit)
+    ]
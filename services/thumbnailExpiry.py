@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+
+def thumbnailExpiry(url):
+    """
+    Liest das Ablaufdatum aus einer signierten CDN-URL: TikTok setzt
+    "x-expires" (Unix-Zeit), Instagram "oe" (Unix-Zeit hexadezimal). URLs
+    ohne Signatur (z.B. placehold.co) laufen nicht ab, dann gibt es None.
+    """
+    if not url:
+        return None
+    query = parse_qs(urlsplit(url).query)
+    try:
+        if "x-expires" in query:
+            timestamp = int(query["x-expires"][0])
+        elif "oe" in query:
+            timestamp = int(query["oe"][0], 16)
+        else:
+            return None
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
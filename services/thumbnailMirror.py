@@ -0,0 +1,81 @@
+import hashlib
+import logging
+from io import BytesIO
+
+import requests
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from services import httpClient
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = "thumbnails"
+# Schlüssel in Recipe.thumbnail_variants -> (Pillow-Format, Dateiendung, Optionen)
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 6}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def _download(url):
+    response = httpClient.get(url, stream=True)
+    with response:
+        response.raise_for_status()
+        data = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            data += chunk
+            if len(data) > settings.THUMBNAIL_MAX_BYTES:
+                raise ValueError(f"Bild größer als {settings.THUMBNAIL_MAX_BYTES} Bytes")
+    return bytes(data)
+
+
+def variantName(digest, width, extension):
+    return f"{THUMBNAIL_DIR}/{digest[:2]}/{digest[:32]}-{width}.{extension}"
+
+
+def storeVariants(data):
+    """
+    Verkleinert ein Bild auf die Breiten aus THUMBNAIL_WIDTHS (nie vergrößert)
+    und legt jede Breite als WebP und JPEG in default_storage ab. Die Namen
+    hängen nur vom Bildinhalt ab: Kopien und erneute Importe desselben Videos
+    teilen sich die Dateien, und schon vorhandene werden nicht neu geschrieben.
+    Gibt {"webp": {"256": name, ...}, "jpeg": {...}} zurück.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    image = Image.open(BytesIO(data))
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    widths = [width for width in settings.THUMBNAIL_WIDTHS if width <= image.width] or [image.width]
+
+    variants = {key: {} for key in FORMATS}
+    for width in widths:
+        resized = None
+        for key, (image_format, extension, options) in FORMATS.items():
+            name = variantName(digest, width, extension)
+            if not default_storage.exists(name):
+                if resized is None:
+                    height = max(1, round(image.height * width / image.width))
+                    resized = image.resize((width, height), Image.Resampling.LANCZOS)
+                buffer = BytesIO()
+                resized.save(buffer, image_format, **options)
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            variants[key][str(width)] = name
+    return variants
+
+
+def mirrorThumbnail(url):
+    """
+    Lädt ein Vorschaubild einmal herunter und legt verkleinerte Varianten lokal
+    ab (storeVariants). Bei Fehlern gibt es None, das Rezept behält dann nur
+    die entfernte URL.
+    """
+    if not url or not url.startswith(("http://", "https://")):
+        return None
+    try:
+        return storeVariants(_download(url))
+    except (requests.RequestException, httpClient.CircuitOpenError, OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning("Vorschaubild %s nicht gespiegelt: %s", url, e)
+        return None
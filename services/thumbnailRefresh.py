@@ -0,0 +1,97 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+
+from recipes.models import Recipe
+from services.getInstaDesc import getInstaDesc
+from services.getTikTokDesc import getTikTokDesc
+from services.searchCache import bumpLibraryVersion
+from services.thumbnailExpiry import thumbnailExpiry
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+# laufende Abrufe je Rezept: gleichzeitige Anfragen warten auf denselben Future
+_inflight = {}
+_lock = threading.RLock()
+
+
+def _getExecutor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_REFRESH_WORKERS, thread_name_prefix="thumbnail-refresh"
+            )
+    return _executor
+
+
+def fetchThumbnail(url):
+    """
+    Holt die aktuelle Vorschaubild-URL eines TikTok- oder Instagram-Videos.
+    """
+    if "instagram.com" in url:
+        # der Beschreibungs-Cache kann noch die abgelaufene URL enthalten
+        result = getInstaDesc(url, use_cache=False)
+        return result[1] if result else None
+    return getTikTokDesc(url)[1] or None
+
+
+def _forget(recipe_id, future):
+    with _lock:
+        if _inflight.get(recipe_id) is future:
+            del _inflight[recipe_id]
+
+
+def _submit(recipe):
+    with _lock:
+        future = _inflight.get(recipe.id)
+        if future is None:
+            future = _getExecutor().submit(fetchThumbnail, recipe.url)
+            _inflight[recipe.id] = future
+            future.add_done_callback(lambda done, recipe_id=recipe.id: _forget(recipe_id, done))
+    return future
+
+
+def refreshThumbnails(recipes):
+    """
+    Holt für alle `recipes` neue Vorschaubilder, höchstens THUMBNAIL_REFRESH_WORKERS
+    gleichzeitig, und speichert geänderte URLs in einem UPDATE. Wird ein Rezept
+    gerade schon von einer anderen Anfrage aktualisiert, wird auf deren Ergebnis
+    gewartet statt erneut abzufragen. Abrufzeit und Ablaufdatum werden für jedes
+    erfolgreich abgefragte Rezept mitgespeichert. Gibt {recipe_id: thumbnail_url} zurück.
+    """
+    futures = [(recipe, _submit(recipe)) for recipe in recipes]
+
+    thumbnails, fetched, changed = {}, [], []
+    now = timezone.now()
+    for recipe, future in futures:
+        try:
+            thumbnail = future.result(timeout=settings.THUMBNAIL_REFRESH_TIMEOUT)
+        except Exception as e:
+            logger.warning("Vorschaubild für Rezept %s nicht aktualisiert: %s", recipe.id, e)
+            continue
+        expires_at = thumbnailExpiry(thumbnail)
+        if not thumbnail or (expires_at is not None and expires_at <= now):
+            # eine schon abgelaufene URL zählt nicht als erneuert
+            continue
+        thumbnails[recipe.id] = thumbnail
+        if thumbnail != recipe.thumbnail:
+            recipe.thumbnail = thumbnail
+            changed.append(recipe)
+        recipe.thumbnail_fetched_at = now
+        recipe.thumbnail_expires_at = expires_at
+        fetched.append(recipe)
+
+    if fetched:
+        Recipe.objects.bulk_update(
+            fetched, ["thumbnail", "thumbnail_fetched_at", "thumbnail_expires_at"]
+        )
+    if changed:
+        # zwischengespeicherte Suchergebnisse enthalten noch die alten URLs
+        for user_id in {recipe.user_id for recipe in changed}:
+            bumpLibraryVersion(user_id)
+    return thumbnails
@@ -0,0 +1,44 @@
+import threading
+import time
+
+
+class RateLimited(Exception):
+    """
+    Innerhalb der erlaubten Wartezeit war kein Token frei.
+    """
+
+
+class TokenBucket:
+    """
+    Erlaubt im Mittel `rate` Aufrufe pro Sekunde und kurzfristig bis zu
+    `capacity` am Stück. Threadsicher; acquire() wartet, bis ein Token frei ist.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # gibt die Wartezeit bis zum reservierten Token zurück
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self, timeout=None):
+        """
+        Wartet auf ein Token. Wäre die Wartezeit länger als `timeout` Sekunden,
+        wird sofort RateLimited ausgelöst, ohne ein Token zu verbrauchen.
+        """
+        wait = self._reserve()
+        if timeout is not None and wait > timeout:
+            with self._lock:
+                self.tokens += 1
+            raise RateLimited(f"nächster Aufruf erst in {wait:.0f} s möglich")
+        if wait:
+            time.sleep(wait)
@@ -100,6 +100,23 @@ else:
 }
 
 
+# Cache
+# "search" holds search result pages; keys contain the user's library_version,
+# so entries of changed libraries are never read again and age out (LRU)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "search": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "search",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 2000, "CULL_FREQUENCY": 10},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -139,9 +156,102 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+
+# Uploaded/mirrored files (default_storage); thumbnails below MEDIA_URL are
+# served by recipes.views.thumbnail_file unless the storage backend has its own URLs
+MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"
 LOGIN_URL = "/login/"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Search
+# "scan", "sqlite_fts5" or "mysql_fulltext"; empty = chosen by database engine
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND")
+SEARCH_CANDIDATE_LIMIT = 500
+SEARCH_PAGE_SIZE = 24
+# per-process prefix indexes for /search/suggest/, one per user
+SEARCH_SUGGEST_MAX_USERS = 256
+# discovery search over all public profiles ("scope=public")
+DISCOVERY_SHARDS = 8
+DISCOVERY_WORKERS = os.cpu_count() or 1
+DISCOVERY_REFRESH_SECONDS = 300
+# below this many recipes the shards are scored in-process without a pool
+DISCOVERY_INLINE_THRESHOLD = 20000
+
+# Pantry ("Was kann ich kochen?")
+PANTRY_MATCH_THRESHOLD = 85
+PANTRY_RESULT_LIMIT = 48
+PANTRY_MAX_INDEXES = 64
+
+# Recipe import jobs (local thread pool, no broker)
+IMPORT_WORKERS = 4
+IMPORT_MAX_ATTEMPTS = 3
+# seconds before the first retry, doubled on every further attempt
+IMPORT_RETRY_DELAY = 5
+# queued jobs untouched for this long are resumed on the next status poll
+IMPORT_STALE_SECONDS = 300
+# running jobs without a heartbeat for this long are only resumed by
+# "manage.py process_import_jobs" (after a restart), never by a poll
+IMPORT_RUNNING_STALE_SECONDS = 900
+# bulk import: links per request, parallel caption fetches, parallel LLM calls
+BULK_IMPORT_MAX_LINKS = 100
+IMPORT_FETCH_WORKERS = 8
+IMPORT_EXTRACT_WORKERS = 10
+# "langextract" (Gemini) or "fake" (deterministic local stand-in for load tests)
+RECIPE_EXTRACTOR_BACKEND = os.getenv("RECIPE_EXTRACTOR_BACKEND", "langextract")
+# seconds per round of parallel requests, only used by the "fake" backend
+RECIPE_EXTRACTOR_FAKE_LATENCY = float(os.getenv("RECIPE_EXTRACTOR_FAKE_LATENCY", "1.0"))
+# captions are cleaned and cut to roughly this many tokens before extraction
+CAPTION_TOKEN_BUDGET = 1500
+# captions with clear "Zutaten:"/"Zubereitung:" sections at or above this
+# confidence are parsed locally instead of going to the extractor
+CAPTION_PARSER_MIN_CONFIDENCE = 0.8
+
+# Outbound HTTP (oEmbed, short links) through services.httpClient
+HTTP_CONNECT_TIMEOUT = 3
+HTTP_READ_TIMEOUT = 10
+HTTP_RETRIES = 2
+# seconds, doubled on every further retry
+HTTP_RETRY_BACKOFF = 0.5
+HTTP_POOL_SIZE = 20
+# consecutive failures before a host is blocked, and for how many seconds
+HTTP_BREAKER_THRESHOLD = 5
+HTTP_BREAKER_COOLDOWN = 30
+# latency samples kept per host for p50/p95, logged per host at most this often
+HTTP_METRICS_SAMPLES = 500
+HTTP_METRICS_LOG_SECONDS = 600
+
+# Instagram lookups (services.getInstaDesc), shared by all import workers
+# optional: session saved with "instaloader --login USER"
+INSTAGRAM_SESSION_USER = os.getenv("INSTAGRAM_SESSION_USER")
+INSTAGRAM_SESSION_FILE = os.getenv("INSTAGRAM_SESSION_FILE")
+INSTAGRAM_REQUESTS_PER_MINUTE = 20
+INSTAGRAM_BURST = 3
+# longer waits for a free slot fail the attempt, the import job retries later
+INSTAGRAM_MAX_WAIT = 30
+INSTAGRAM_CACHE_SIZE = 512
+
+# Batched thumbnail refresh (/recipe/refresh_thumbnails/)
+THUMBNAIL_REFRESH_WORKERS = 8
+THUMBNAIL_REFRESH_MAX_IDS = 100
+THUMBNAIL_REFRESH_TIMEOUT = 15
+# "manage.py refresh_thumbnails": refresh signed thumbnails this many seconds
+# before they expire, only between these local hours [start, end)
+THUMBNAIL_REFRESH_HORIZON = 12 * 3600
+THUMBNAIL_OFF_PEAK_HOURS = (2, 6)
+THUMBNAIL_SCHEDULER_PER_MINUTE = 30
+THUMBNAIL_SCHEDULER_BATCH = 10
+
+# Local thumbnail copies (services.thumbnailMirror), made once at import time;
+# cards are 256px wide, 512 covers high-density screens
+THUMBNAIL_WIDTHS = (256, 512)
+THUMBNAIL_MAX_BYTES = 5 * 1024 * 1024
+# file names contain the content hash, so they can be cached forever
+THUMBNAIL_CACHE_SECONDS = 365 * 24 * 3600
+
+# LLM extraction results, keyed by caption + prompt version + model
+EXTRACTION_CACHE_MAX_ENTRIES = 5000
@@ -0,0 +1,59 @@
+// Sammelt kaputte Vorschaubilder (abgelaufene TikTok/Instagram-URLs) und
+// erneuert sie gemeinsam mit einer Anfrage statt einer pro Bild.
+const THUMBNAIL_REFRESH_URL = '/recipe/refresh_thumbnails/';
+const THUMBNAIL_BATCH_DELAY = 100; // ms warten, bis alle Fehler einer Seite da sind
+const THUMBNAIL_BATCH_SIZE = 100; // wie THUMBNAIL_REFRESH_MAX_IDS
+
+const brokenThumbnails = new Map(); // recipeId -> [img, ...]
+const refreshedRecipes = new Set(); // pro Seite nur einmal versuchen
+let thumbnailTimer = null;
+
+function csrfToken() {
+    const input = document.querySelector('[name=csrfmiddlewaretoken]');
+    if (input) return input.value;
+    const cookie = document.cookie.split('; ').find(row => row.startsWith('csrftoken='));
+    return cookie ? cookie.split('=')[1] : null;
+}
+
+function handleImageError(imageElement, recipeId) {
+    imageElement.onerror = null;
+    if (refreshedRecipes.has(recipeId)) return;
+
+    if (!brokenThumbnails.has(recipeId)) brokenThumbnails.set(recipeId, []);
+    brokenThumbnails.get(recipeId).push(imageElement);
+
+    clearTimeout(thumbnailTimer);
+    thumbnailTimer = setTimeout(flushBrokenThumbnails, THUMBNAIL_BATCH_DELAY);
+}
+
+function flushBrokenThumbnails() {
+    const token = csrfToken();
+    if (!token) {
+        console.error('CSRF token not found.');
+        return;
+    }
+
+    const pending = new Map(brokenThumbnails);
+    brokenThumbnails.clear();
+    const ids = [...pending.keys()];
+    ids.forEach(id => refreshedRecipes.add(id));
+
+    for (let start = 0; start < ids.length; start += THUMBNAIL_BATCH_SIZE) {
+        fetch(THUMBNAIL_REFRESH_URL, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': token,
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ ids: ids.slice(start, start + THUMBNAIL_BATCH_SIZE) })
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.status !== 'ok') return;
+                Object.entries(data.thumbnails).forEach(([id, url]) => {
+                    (pending.get(Number(id)) || []).forEach(img => { img.src = url; });
+                });
+            })
+            .catch(error => console.error('Error refreshing thumbnails:', error));
+    }
+}